@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Archive Reader
+Lists and streams the .docx members of zip and tar bundles without extracting them
+"""
+
+import itertools
+import os
+import posixpath
+import tarfile
+import zipfile
+
+
+ARCHIVE_SUFFIXES = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+
+# Separates the archive from the member in an input name: "drafts.zip!march/post.docx"
+MEMBER_SEPARATOR = '!'
+
+
+def is_archive(path):
+    """True for an existing zip or tar bundle (by extension; a .docx is a zip too)"""
+    return path.lower().endswith(ARCHIVE_SUFFIXES) and os.path.isfile(path)
+
+
+def archive_stem(archive):
+    """Archive path without its archive extension: drafts.tar.gz -> drafts"""
+    lower = archive.lower()
+    for suffix in sorted(ARCHIVE_SUFFIXES, key=len, reverse=True):
+        if lower.endswith(suffix):
+            return archive[:-len(suffix)]
+    return archive
+
+
+def is_document_member(name):
+    """True for .docx members, leaving out Word lock files and macOS metadata"""
+    base = posixpath.basename(name)
+    return (name.lower().endswith('.docx') and not base.startswith('~$')
+            and not base.startswith('._') and not name.startswith('__MACOSX/'))
+
+
+def list_documents(archive):
+    """Names of the .docx members of an archive, in archive order"""
+    if zipfile.is_zipfile(archive):
+        with zipfile.ZipFile(archive) as zf:
+            return [info.filename for info in zf.infolist()
+                    if not info.is_dir() and is_document_member(info.filename)]
+    with tarfile.open(archive, 'r|*') as tf:
+        return [member.name for member in tf if member.isfile() and is_document_member(member.name)]
+
+
+def member_input(archive, member):
+    """Input name for one archive member"""
+    return f"{archive}{MEMBER_SEPARATOR}{member}"
+
+
+def split_member(input_file):
+    """(archive, member) for an archive member input name, or None for a plain path"""
+    start = 0
+    while True:
+        index = input_file.find(MEMBER_SEPARATOR, start)
+        if index < 0:
+            return None
+        if input_file[:index].lower().endswith(ARCHIVE_SUFFIXES):
+            return input_file[:index], input_file[index + 1:]
+        start = index + 1
+
+
+def safe_member_path(member):
+    """Member name as a relative path that cannot climb out of its target directory"""
+    parts = [part for part in posixpath.normpath(member.replace('\\', '/')).split('/')
+             if part not in ('', '.', '..')]
+    return os.path.join(*parts) if parts else 'document.docx'
+
+
+def output_path_for(input_file):
+    """Path used to place an input's output: a member maps to <archive stem>/<member path>"""
+    split = split_member(input_file)
+    if split is None:
+        return input_file
+    archive, member = split
+    return os.path.join(archive_stem(archive), safe_member_path(member))
+
+
+def iter_member_data(archive, members):
+    """Yield (member, bytes) for the wanted members, reading the archive once
+
+    Zip members are read directly; tar archives (compressed or not) are read
+    as a stream from start to end, so members come out in archive order.
+    """
+    wanted = set(members)
+    if zipfile.is_zipfile(archive):
+        with zipfile.ZipFile(archive) as zf:
+            for member in members:
+                yield member, zf.read(member)
+        return
+    with tarfile.open(archive, 'r|*') as tf:
+        for info in tf:
+            if info.name in wanted and info.isfile():
+                yield info.name, tf.extractfile(info).read()
+
+
+def iter_sources(input_files):
+    """Yield (input_file, data) for each input: data is the member's bytes, or None for a path
+
+    Consecutive members of one archive are read in a single pass over it.
+    """
+    def archive_of(input_file):
+        split = split_member(input_file)
+        return split[0] if split else None
+
+    for archive, group in itertools.groupby(input_files, key=archive_of):
+        if archive is None:
+            for input_file in group:
+                yield input_file, None
+            continue
+        members = [split_member(input_file)[1] for input_file in group]
+        for member, data in iter_member_data(archive, members):
+            yield member_input(archive, member), data
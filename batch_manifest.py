@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Batch Manifest
+Checkpoints per-document batch state in SQLite so interrupted runs can resume
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+
+from conversion_cache import file_digest
+
+
+STATUSES = ('pending', 'done', 'failed')
+
+
+class BatchManifest:
+    """SQLite record of every document in a batch: status, hash, output, duration, error
+
+    `plan` registers a batch and returns the documents still to convert:
+    those that are new, pending (the run stopped before reaching them),
+    changed since they were converted or whose output is missing or now
+    goes elsewhere, plus failed ones with `retry_failed`. A document counts
+    as unchanged if its size and mtime match, or failing that its content
+    hash. Only documents whose mtime changed are hashed while planning; the
+    others are hashed by the workers that convert them, and their hashes
+    arrive with the results. A document that cannot be read while planning
+    is recorded as failed. Results passed to `record` are
+    written in bulk transactions of `flush_every` results or every
+    `flush_interval` seconds, so a crash loses at most that much progress,
+    and those documents are simply converted again.
+    """
+
+    def __init__(self, path, flush_every=200, flush_interval=2.0):
+        self.path = path
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.skipped_done = 0
+        self.skipped_failed = 0
+        self._buffer = []
+        self._last_flush = time.monotonic()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS documents ('
+            ' input TEXT PRIMARY KEY,'
+            ' status TEXT NOT NULL,'
+            ' size INTEGER,'
+            ' mtime_ns INTEGER,'
+            ' input_hash TEXT,'
+            ' output TEXT,'
+            ' duration REAL,'
+            ' error TEXT,'
+            ' updated REAL NOT NULL)'
+        )
+        self._db.execute('CREATE INDEX IF NOT EXISTS documents_status ON documents (status)')
+        self._db.commit()
+
+    def plan(self, input_files, outputs=None, retry_failed=False):
+        """Register the batch's documents; returns the ones that need converting"""
+        known = {row[0]: row[1:] for row in self._db.execute(
+            'SELECT input, status, size, mtime_ns, input_hash, output FROM documents')}
+        outputs = outputs or {}
+        now = time.time()
+        to_run = []
+        rows = []
+        missing = []
+        for input_file in input_files:
+            key = os.path.abspath(input_file)
+            try:
+                stat = os.stat(input_file)
+            except OSError as e:
+                # Still handed to the batch, so its failure is reported with the rest
+                missing.append((key, f"{type(e).__name__}: {e}", now))
+                to_run.append(input_file)
+                continue
+            previous = known.get(key)
+            output = outputs.get(input_file)
+            input_hash = None
+            unchanged = False
+            if previous is not None and stat.st_size == previous[1]:
+                if stat.st_mtime_ns == previous[2]:
+                    unchanged = True
+                elif previous[3] is not None:
+                    # Touched or copied but possibly identical
+                    input_hash = self._digest(input_file)
+                    unchanged = input_hash == previous[3]
+            if unchanged:
+                if previous[0] == 'done' and self._output_current(previous[4], output):
+                    self.skipped_done += 1
+                    continue
+                if previous[0] == 'failed' and not retry_failed:
+                    self.skipped_failed += 1
+                    continue
+            to_run.append(input_file)
+            rows.append((key, stat.st_size, stat.st_mtime_ns, input_hash, output, now))
+
+        with self._db:
+            self._db.executemany(
+                'INSERT INTO documents (input, status, size, mtime_ns, input_hash, output, updated)'
+                " VALUES (?, 'pending', ?, ?, ?, ?, ?)"
+                ' ON CONFLICT (input) DO UPDATE SET status = excluded.status, size = excluded.size,'
+                ' mtime_ns = excluded.mtime_ns, input_hash = excluded.input_hash, output = excluded.output,'
+                ' duration = NULL, error = NULL, updated = excluded.updated',
+                rows
+            )
+            self._db.executemany(
+                'INSERT INTO documents (input, status, error, updated)'
+                " VALUES (?, 'failed', ?, ?)"
+                ' ON CONFLICT (input) DO UPDATE SET status = excluded.status, size = NULL, mtime_ns = NULL,'
+                ' input_hash = NULL, output = NULL, duration = NULL, error = excluded.error,'
+                ' updated = excluded.updated',
+                missing
+            )
+        return to_run
+
+    @staticmethod
+    def _digest(input_file):
+        try:
+            return file_digest(input_file)
+        except OSError:
+            return None
+
+    @staticmethod
+    def _output_current(stored, planned):
+        """True if a done document's output still exists where this run would write it"""
+        if stored is None or not os.path.exists(stored):
+            return False
+        return planned is None or os.path.abspath(planned) == os.path.abspath(stored)
+
+    def record(self, result):
+        """Queue one batch result (a convert_batch result dict) for the next bulk write
+
+        The result's "input_hash", taken by the worker, replaces the stored
+        one; without it the hash stored by `plan` is kept. Nothing is re-read here.
+        """
+        self._buffer.append((
+            'failed' if result["error"] else 'done',
+            result.get("input_hash"),
+            result["output"],
+            result["duration"],
+            result["error"],
+            time.time(),
+            os.path.abspath(result["input"]),
+        ))
+        if (len(self._buffer) >= self.flush_every
+                or time.monotonic() - self._last_flush >= self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        """Write the queued results in one transaction"""
+        if self._buffer:
+            with self._db:
+                self._db.executemany(
+                    'UPDATE documents SET status = ?, input_hash = COALESCE(?, input_hash), output = ?,'
+                    ' duration = ?, error = ?, updated = ? WHERE input = ?',
+                    self._buffer
+                )
+            self._buffer = []
+        self._last_flush = time.monotonic()
+
+    def counts(self):
+        """Number of documents in each status"""
+        counts = dict.fromkeys(STATUSES, 0)
+        counts.update(self._db.execute('SELECT status, COUNT(*) FROM documents GROUP BY status'))
+        return counts
+
+    def slowest(self, limit=10):
+        """(input, duration, output) of the slowest converted documents"""
+        return self._db.execute(
+            "SELECT input, duration, output FROM documents WHERE status = 'done'"
+            ' ORDER BY duration DESC LIMIT ?', (limit,)).fetchall()
+
+    def failures(self):
+        """(input, error) of every failed document"""
+        return self._db.execute(
+            "SELECT input, error FROM documents WHERE status = 'failed' ORDER BY input").fetchall()
+
+    def close(self):
+        self.flush()
+        self._db.close()
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Query a batch checkpoint manifest')
+    parser.add_argument('manifest', help='Manifest written by cli_converter.py --checkpoint')
+    parser.add_argument('--slowest', type=int, metavar='N', help='List the N slowest documents')
+    parser.add_argument('--failed', action='store_true', help='List failed documents and their errors')
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.manifest):
+        print(f"Error: Manifest '{args.manifest}' does not exist.")
+        sys.exit(1)
+
+    manifest = BatchManifest(args.manifest)
+    counts = manifest.counts()
+    print(f"Documents: {sum(counts.values())} "
+          f"({counts['done']} done, {counts['failed']} failed, {counts['pending']} pending)")
+
+    if args.slowest:
+        print("")
+        print(f"Slowest {args.slowest}:")
+        for input_file, duration, _ in manifest.slowest(args.slowest):
+            print(f"  {duration:8.2f}s  {input_file}")
+
+    if args.failed:
+        print("")
+        print("Failed:")
+        for input_file, error in manifest.failures():
+            print(f"  {input_file}: {error}")
+
+    manifest.close()
+
+
+if __name__ == "__main__":
+    main()
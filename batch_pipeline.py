@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Batch Pipeline
+Staged batch conversion: reader threads, a worker process pool and writer/publisher threads
+"""
+
+import queue
+import threading
+import time
+
+
+# Marks the end of a stage's input
+_DONE = object()
+
+
+class StageStats:
+    """Counters for one pipeline stage
+
+    `items` and `busy` (seconds spent working, summed over the stage's
+    workers) give its utilization over the run; the depth of the stage's
+    input queue is sampled each time an item is taken from it. A stage
+    near 100% utilization with a full input queue is the bottleneck.
+    """
+
+    def __init__(self, name, workers, capacity=None):
+        self.name = name
+        self.workers = workers
+        self.capacity = capacity
+        self.items = 0
+        self.busy = 0.0
+        self.depth_max = 0
+        self._depth_total = 0
+        self._depth_samples = 0
+        self._lock = threading.Lock()
+
+    def sample(self, depth):
+        with self._lock:
+            self._depth_total += depth
+            self._depth_samples += 1
+            self.depth_max = max(self.depth_max, depth)
+
+    def done(self, duration):
+        with self._lock:
+            self.items += 1
+            self.busy += duration
+
+    def summary(self, elapsed):
+        return {
+            "stage": self.name,
+            "workers": self.workers,
+            "items": self.items,
+            "busy": self.busy,
+            "utilization": self.busy / (elapsed * self.workers) if elapsed > 0 and self.workers else 0.0,
+            "queue_avg": self._depth_total / self._depth_samples if self._depth_samples else 0.0,
+            "queue_max": self.depth_max,
+            "queue_capacity": self.capacity,
+        }
+
+
+class BatchPipeline:
+    """Runs a batch as concurrent stages connected by bounded queues
+
+    - read: `readers` threads load each document's bytes (archive members
+      arrive already read) into a queue of at most `queue_size` documents
+    - convert: documents are submitted to the executor given to `run` (a
+      process pool whose workers run `convert(input_file, output_file,
+      data)` and return a result dict with the serialized output under
+      "payload"), with at most `max_in_flight` submitted but not yet written
+    - write: `writers` threads write each payload to its output file
+    - publish: with a `publisher`, `publishers` threads upsert each written
+      record (the result's "record") into Strapi
+
+    A slow stage fills its input queue and blocks the stage before it, so
+    memory stays capped at roughly `queue_size` + `max_in_flight`
+    documents however large the batch, while reading, converting and
+    writing overlap. Per-stage counters are kept in `stats`.
+
+    If the executor breaks (a worker process dies), the readers stop, the
+    documents still queued are reported as failed and `run` re-raises the
+    error once every stage has drained.
+    """
+
+    def __init__(self, convert, jobs, readers=2, writers=2, queue_size=None, max_in_flight=None,
+                 publisher=None, publishers=None):
+        self.executor = None
+        self.convert = convert
+        self.readers = readers
+        self.writers = writers
+        self.publisher = publisher
+        self.publishers = publishers or (publisher.concurrency if publisher is not None else 0)
+        self.queue_size = queue_size or 2 * jobs
+        self.max_in_flight = max_in_flight or 2 * jobs
+
+        self._read_q = queue.Queue(self.queue_size)
+        self._write_q = queue.Queue()
+        self._publish_q = queue.Queue(self.queue_size)
+        self._results = queue.Queue()
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+        self._tasks_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._failure = None
+
+        self.stats = {
+            "read": StageStats("read", readers),
+            "convert": StageStats("convert", jobs, self.queue_size),
+            "write": StageStats("write", writers, self.max_in_flight),
+        }
+        if publisher is not None:
+            self.stats["publish"] = StageStats("publish", self.publishers, self.queue_size)
+
+    def run(self, executor, tasks):
+        """Convert (input_file, output_file, data or None) tasks; yields result dicts as they finish"""
+        self.executor = executor
+        tasks = iter(tasks)
+        # Threads still running per stage; the last one out closes the next queue
+        self._remaining = {"read": self.readers, "write": self.writers, "publish": self.publishers}
+        threads = [self._start(self._read, tasks) for _ in range(self.readers)]
+        threads.append(self._start(self._dispatch))
+        threads += [self._start(self._write) for _ in range(self.writers)]
+        if self.publisher is not None:
+            threads += [self._start(self._publish) for _ in range(self.publishers)]
+
+        try:
+            while True:
+                result = self._results.get()
+                if result is _DONE:
+                    break
+                yield result
+        finally:
+            for thread in threads:
+                thread.join()
+        if self._failure is not None:
+            raise self._failure
+
+    def _start(self, target, *args):
+        def guarded():
+            try:
+                target(*args)
+            except BaseException as e:
+                # Keep the rest of the pipeline draining, then re-raise in run()
+                self._failure = self._failure or e
+                raise
+        thread = threading.Thread(target=guarded, daemon=True)
+        thread.start()
+        return thread
+
+    def _finish(self, stage, downstream, count=1):
+        """Called as each thread of `stage` exits; the last one closes the downstream queue"""
+        with self._tasks_lock:
+            self._remaining[stage] -= 1
+            last = self._remaining[stage] == 0
+        if last:
+            for _ in range(count):
+                downstream.put(_DONE)
+
+    def _read(self, tasks):
+        stats = self.stats["read"]
+        try:
+            while not self._stop.is_set():
+                start = time.perf_counter()
+                with self._tasks_lock:
+                    task = next(tasks, None)
+                if task is None:
+                    break
+                input_file, output_file, data = task
+                error = None
+                if data is None:
+                    try:
+                        with open(input_file, 'rb') as f:
+                            data = f.read()
+                    except OSError as e:
+                        error = f"{type(e).__name__}: {e}"
+                stats.done(time.perf_counter() - start)
+                self._read_q.put((input_file, output_file, data, error))
+        finally:
+            self._finish("read", self._read_q)
+
+    def _dispatch(self):
+        stats = self.stats["convert"]
+        broken = None
+        try:
+            # Keeps draining the read queue after a failure, so readers never block on it
+            while True:
+                stats.sample(self._read_q.qsize())
+                item = self._read_q.get()
+                if item is _DONE:
+                    break
+                input_file, output_file, data, error = item
+                self._slots.acquire()
+                if error is None and broken is None:
+                    try:
+                        future = self.executor.submit(self.convert, input_file, output_file, data)
+                    except Exception as e:
+                        # The executor is unusable: fail what is left and stop reading
+                        broken = f"{type(e).__name__}: {e}"
+                        self._failure = self._failure or e
+                        self._stop.set()
+                    else:
+                        future.add_done_callback(
+                            lambda future, input_file=input_file, output_file=output_file:
+                            self._write_q.put((input_file, output_file, future, None)))
+                        continue
+                self._write_q.put((input_file, output_file, None, error or broken))
+            # Wait for every submitted document to be written
+            for _ in range(self.max_in_flight):
+                self._slots.acquire()
+        finally:
+            for _ in range(self.writers):
+                self._write_q.put(_DONE)
+
+    def _write(self):
+        stats = self.stats["write"]
+        convert_stats = self.stats["convert"]
+        next_q = self._publish_q if self.publisher is not None else self._results
+        try:
+            while True:
+                stats.sample(self._write_q.qsize())
+                item = self._write_q.get()
+                if item is _DONE:
+                    break
+                input_file, output_file, future, error = item
+                start = time.perf_counter()
+                try:
+                    if error is not None:
+                        raise OSError(error)
+                    result = future.result()
+                    convert_stats.done(result["duration"])
+                    payload = result.pop("payload", None)
+                    if payload is not None:
+                        with open(output_file, 'wb') as f:
+                            f.write(payload)
+                except Exception as e:
+                    message = error or f"{type(e).__name__}: {e}"
+                    result = {"input": input_file, "output": None, "error": message, "duration": 0.0,
+                              "cached": None}
+                finally:
+                    self._slots.release()
+                stats.done(time.perf_counter() - start)
+                next_q.put(result)
+        finally:
+            self._finish("write", next_q, self.publishers if self.publisher is not None else 1)
+
+    def _publish(self):
+        stats = self.stats["publish"]
+        try:
+            while True:
+                stats.sample(self._publish_q.qsize())
+                result = self._publish_q.get()
+                if result is _DONE:
+                    break
+                record = result.pop("record", None)
+                # Failed and unchanged documents are not published
+                if record is not None and not result["error"] and result.get("changes") != []:
+                    start = time.perf_counter()
+                    changed = result["changes"] if result.get("previous") else None
+                    result["published"] = self.publisher.publish(record, changed, result.get("previous"))
+                    stats.done(time.perf_counter() - start)
+                self._results.put(result)
+        finally:
+            self._finish("publish", self._results)
+
+    def summary(self, elapsed):
+        """Per-stage counters, in pipeline order"""
+        return [stats.summary(elapsed) for stats in self.stats.values()]
+
+
+def print_pipeline_summary(stages):
+    """Print each stage's workers, items, utilization and queue depth"""
+    print("")
+    print("PIPELINE STAGES:")
+    print("=" * 50)
+    print(f"{'Stage':<10}{'Workers':>8}{'Items':>8}{'Busy':>10}{'Util':>7}  Queue (avg/max/size)")
+    for stage in stages:
+        queue_depth = ''
+        if stage['queue_capacity']:
+            queue_depth = f"{stage['queue_avg']:.1f}/{stage['queue_max']}/{stage['queue_capacity']}"
+        print(f"{stage['stage']:<10}{stage['workers']:>8}{stage['items']:>8}{stage['busy']:>9.2f}s"
+              f"{stage['utilization']:>7.0%}  {queue_depth}")
+    busiest = max(stages, key=lambda stage: stage['utilization'])
+    if busiest['utilization'] > 0:
+        print(f"Bottleneck: {busiest['stage']} ({busiest['utilization']:.0%} busy)")
+
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Converter Benchmark
+Generates a synthetic corpus and times each phase of the conversion
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from cli_converter import CLIWordToStrapiConverter
+from json_serializer import BACKENDS, JSONSerializer
+from sample_template import create_sample_document
+
+
+PHASES = ["load", "extract_document", "generate_strapi_layout", "serialize", "write"]
+
+# The streaming engine reads the table and the content in one pass
+STREAM_PHASES = ["extract_streaming", "generate_strapi_layout", "serialize", "write"]
+
+# Seconds each headless entry point may take to import
+DEFAULT_IMPORT_BUDGET = 0.25
+
+# Modules the headless entry points must not load at import time
+DEFERRED_MODULES = ["tkinter", "docx", "lxml", "json5"]
+
+IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "loaded": [name for name in {deferred!r} if name in sys.modules]}}))
+"""
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None where it cannot be read"""
+    if sys.platform == 'win32':
+        return peak_working_set_mb()
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def peak_working_set_mb():
+    """Peak working set of this process in MB (Windows), or None if it cannot be read"""
+    import ctypes
+    from ctypes import wintypes
+
+    class ProcessMemoryCounters(ctypes.Structure):
+        _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                    ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                    ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                    ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+    try:
+        kernel32, psapi = ctypes.WinDLL('kernel32'), ctypes.WinDLL('psapi')
+    except (AttributeError, OSError):
+        return None
+    kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+    psapi.GetProcessMemoryInfo.argtypes = [wintypes.HANDLE, ctypes.POINTER(ProcessMemoryCounters), wintypes.DWORD]
+    counters = ProcessMemoryCounters()
+    counters.cb = ctypes.sizeof(counters)
+    if not psapi.GetProcessMemoryInfo(kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb):
+        return None
+    return counters.PeakWorkingSetSize / (1024 * 1024)
+
+
+def generate_corpus(corpus_dir, docs, paragraphs, table_rows, merged_cells, images):
+    """Write `docs` synthetic documents and return their paths"""
+    os.makedirs(corpus_dir, exist_ok=True)
+    paths = []
+    for i in range(docs):
+        path = os.path.join(corpus_dir, f"draft_{i:05d}.docx")
+        if not os.path.exists(path):
+            create_sample_document(path, extra_paragraphs=paragraphs, extra_table_rows=table_rows,
+                                   merged_cells=merged_cells, images=images, quiet=True)
+        paths.append(path)
+    return paths
+
+
+def time_document(converter, input_file, output_file):
+    """Convert one document, returning {phase: seconds}"""
+    timings = {}
+
+    def timed(phase, func, *args, **kwargs):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        timings[phase] = time.perf_counter() - start
+        return result
+
+    if converter.engine == 'stream':
+        table_data, content = timed("extract_streaming", converter.extract_streaming, input_file)
+    else:
+        doc = timed("load", converter.load_document, input_file)
+        table_data, content = timed("extract_document", converter.extract_document, doc)
+    strapi_data = timed("generate_strapi_layout", converter.generate_strapi_layout, table_data, content)
+    data = timed("serialize", converter.serialize, strapi_data)
+
+    def write():
+        with open(output_file, 'wb') as f:
+            f.write(data)
+
+    timed("write", write)
+    return timings
+
+
+def run_benchmark(paths, engine, repeat, output_dir, serializer=None):
+    """Time every document `repeat` times; returns the results dict"""
+    converter = CLIWordToStrapiConverter(engine, serializer=serializer)
+    phases = STREAM_PHASES if engine == 'stream' else PHASES
+    samples = {phase: [] for phase in phases}
+    totals = []
+
+    for _ in range(repeat):
+        for path in paths:
+            output_file = os.path.join(output_dir, os.path.basename(path) + '.json')
+            timings = time_document(converter, path, output_file)
+            for phase, seconds in timings.items():
+                samples[phase].append(seconds)
+            totals.append(sum(timings.values()))
+
+    elapsed = sum(totals)
+    return {
+        "phases": {phase: summarize(values) for phase, values in samples.items()},
+        "documents": len(totals),
+        "elapsed": elapsed,
+        "docs_per_sec": len(totals) / elapsed if elapsed else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def summarize(values):
+    """Total, mean, median and max of a list of timings in seconds"""
+    ordered = sorted(values)
+    return {
+        "total": sum(ordered),
+        "mean": sum(ordered) / len(ordered) if ordered else 0.0,
+        "median": ordered[len(ordered) // 2] if ordered else 0.0,
+        "max": ordered[-1] if ordered else 0.0,
+    }
+
+
+def print_report(results):
+    """Print a per-phase timing table and the totals"""
+    print("")
+    print(f"{'Phase':<26}{'mean ms':>10}{'median ms':>11}{'max ms':>10}{'share':>8}")
+    print("-" * 65)
+    elapsed = results["elapsed"] or 1.0
+    for phase, stats in results["phases"].items():
+        print(f"{phase:<26}{stats['mean'] * 1000:>10.2f}{stats['median'] * 1000:>11.2f}"
+              f"{stats['max'] * 1000:>10.2f}{stats['total'] / elapsed:>8.1%}")
+    print("-" * 65)
+    print(f"Documents:  {results['documents']}")
+    print(f"Throughput: {results['docs_per_sec']:.1f} docs/sec")
+    if results["peak_rss_mb"] is not None:
+        print(f"Peak RSS:   {results['peak_rss_mb']:.1f} MB")
+    else:
+        print("Peak RSS:   unavailable on this platform")
+
+
+def compare_results(results, baseline, threshold):
+    """Print per-phase changes against a baseline run; returns the regressed phases"""
+    print("")
+    print(f"Compared with baseline from {baseline.get('timestamp', 'unknown')}:")
+    regressions = []
+    for phase, stats in results["phases"].items():
+        before = baseline.get("phases", {}).get(phase)
+        if not before or not before["mean"]:
+            continue
+        change = stats["mean"] / before["mean"] - 1
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(phase)
+        print(f"  {phase:<26}{before['mean'] * 1000:>9.2f} -> {stats['mean'] * 1000:>9.2f} ms ({change:+.1%}){flag}")
+    if baseline.get("docs_per_sec"):
+        change = results["docs_per_sec"] / baseline["docs_per_sec"] - 1
+        print(f"  {'throughput':<26}{baseline['docs_per_sec']:>9.1f} -> {results['docs_per_sec']:>9.1f} docs/sec ({change:+.1%})")
+    return regressions
+
+
+def check_imports(budget, modules=("converter_core", "cli_converter")):
+    """Import each entry point in a fresh interpreter and check its cost
+
+    Fails when an import takes longer than `budget` seconds (best of three
+    runs; None checks no time) or loads one of DEFERRED_MODULES. Returns
+    True when all pass.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    ok = True
+    if budget is not None:
+        print(f"Import budget: {budget * 1000:.0f} ms")
+    for module in modules:
+        probe = IMPORT_PROBE.format(module=module, deferred=DEFERRED_MODULES)
+        runs = []
+        for _ in range(3):
+            output = subprocess.run([sys.executable, '-c', probe], cwd=here, check=True,
+                                    capture_output=True, text=True).stdout
+            runs.append(json.loads(output))
+        best = min(run["seconds"] for run in runs)
+        loaded = sorted({name for run in runs for name in run["loaded"]})
+        problems = []
+        if budget is not None and best > budget:
+            problems.append("over budget")
+        if loaded:
+            problems.append(f"loads {', '.join(loaded)}")
+        ok = ok and not problems
+        status = "FAIL (" + "; ".join(problems) + ")" if problems else "ok"
+        print(f"  {module:<20}{best * 1000:>8.1f} ms  {status}")
+    return ok
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Benchmark the Word to Strapi converter on a synthetic corpus')
+    parser.add_argument('--docs', type=int, default=20, help='Number of documents (default: 20)')
+    parser.add_argument('--paragraphs', type=int, default=200,
+                        help='Filler paragraphs added to each document (default: 200)')
+    parser.add_argument('--table-rows', type=int, default=0,
+                        help='Extra non-template rows in the metadata table (default: 0)')
+    parser.add_argument('--merged-cells', type=int, default=0,
+                        help='Metadata table rows with merged cells (default: 0)')
+    parser.add_argument('--images', type=int, default=0, help='Embedded images per document (default: 0)')
+    parser.add_argument('--engine', choices=('python-docx', 'stream'), default='python-docx',
+                        help='Reader engine to benchmark (default: python-docx)')
+    parser.add_argument('--json-backend', choices=BACKENDS, default='auto',
+                        help='JSON encoder to benchmark (default: auto)')
+    parser.add_argument('--compact', action='store_true', help='Benchmark compact JSON output')
+    parser.add_argument('--repeat', type=int, default=1, help='Passes over the corpus (default: 1)')
+    parser.add_argument('--corpus-dir',
+                        help='Keep the generated corpus here and reuse it on later runs (default: temporary)')
+    parser.add_argument('--save', metavar='FILE', help='Save results as JSON')
+    parser.add_argument('--compare', metavar='FILE', help='Compare with results saved by an earlier run')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='Slowdown of a phase counted as a regression (default: 0.10 = 10%%)')
+    parser.add_argument('--check-imports', action='store_true',
+                        help='Only check the import time of the headless modules and exit')
+    parser.add_argument('--import-budget', type=float, default=DEFAULT_IMPORT_BUDGET,
+                        help='Import time allowed per module for --check-imports, in seconds (default: 0.25)')
+
+    args = parser.parse_args()
+
+    if args.check_imports:
+        sys.exit(0 if check_imports(args.import_budget) else 1)
+
+    try:
+        serializer = JSONSerializer(args.json_backend, args.compact)
+    except ValueError as e:
+        parser.error(str(e))
+
+    params = {
+        "docs": args.docs,
+        "paragraphs": args.paragraphs,
+        "table_rows": args.table_rows,
+        "merged_cells": args.merged_cells,
+        "images": args.images,
+        "engine": args.engine,
+        "json_backend": args.json_backend,
+        "compact": args.compact,
+        "repeat": args.repeat,
+    }
+
+    work_dir = tempfile.mkdtemp(prefix='strapi_bench_')
+    try:
+        # Corpora with different shapes live side by side in a kept corpus dir
+        shape = f"p{args.paragraphs}-t{args.table_rows}-m{args.merged_cells}-i{args.images}"
+        corpus_dir = os.path.join(args.corpus_dir or work_dir, shape)
+        print(f"Generating corpus: {args.docs} documents in {corpus_dir}")
+        start = time.perf_counter()
+        # Generated in a child process, so the peak RSS reported below covers
+        # only the conversions
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            paths = pool.submit(generate_corpus, corpus_dir, args.docs, args.paragraphs, args.table_rows,
+                                args.merged_cells, args.images).result()
+        print(f"Corpus ready in {time.perf_counter() - start:.1f}s")
+
+        output_dir = os.path.join(work_dir, 'output')
+        os.makedirs(output_dir)
+        results = run_benchmark(paths, args.engine, args.repeat, output_dir, serializer)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    results = {
+        "timestamp": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": params,
+        **results,
+    }
+    print_report(results)
+
+    exit_code = 0
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get("params") != params:
+            print("Warning: baseline was run with different parameters")
+        if compare_results(results, baseline, args.threshold):
+            exit_code = 1
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results saved to: {args.save}")
+
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
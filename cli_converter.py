@@ -5,98 +5,35 @@ Converts Word documents to Strapi layouts via command line
 """
 
 import argparse
+import contextlib
+import glob
+import io
+import itertools
 import json
 import os
 import sys
-from docx import Document
+import time
 from datetime import datetime
 
+from archive_reader import is_archive, iter_sources, list_documents, member_input, output_path_for, split_member
+from conversion_metrics import MetricsAggregator, PhaseProfiler, profile_phase
+from converter_core import CONTENT_FORMATS, ENGINES, ConversionCore
+from json_serializer import BACKENDS, JSONSerializer
 
-class CLIWordToStrapiConverter:
-    def __init__(self):
-        # Template fields
-        self.template_fields = [
-            "Working Title",
-            "Author", 
-            "Topic",
-            "Blog Category",
-            "Target Keywords",
-            "Target Audience",
-            "Funnel Stage",
-            "CTA",
-            "Working Meta Description"
-        ]
-    
-    def extract_table_data(self, doc):
-        """Extract data from the table at the beginning of the document"""
-        table_data = {}
-        
-        for table in doc.tables:
-            for row in table.rows:
-                cells = [cell.text.strip() for cell in row.cells]
-                if len(cells) >= 2:
-                    field_name = cells[0].strip()
-                    field_value = cells[1].strip()
-                    
-                    # Check if this field is in our template
-                    for template_field in self.template_fields:
-                        if template_field.lower() in field_name.lower():
-                            table_data[template_field] = field_value
-                            break
-        
-        return table_data
+# The cache (sqlite3), pool, publisher (http.client), NDJSON writer (gzip) and
+# watcher modules are imported where they are first needed, so `--help` and
+# a plain single conversion do not pay for them
+
+
+class CLIWordToStrapiConverter(ConversionCore):
+    # Outcome of the last convert_document with a manifest (see emit_strapi_file)
+    last_changes = None
+    last_previous = None
     
-    def extract_content(self, doc):
-        """Extract the content draft that follows the table"""
-        content = []
-        table_found = len(doc.tables) > 0  # If there are tables, we assume the template table is present
-        content_section_found = False
-        
-        for paragraph in doc.paragraphs:
-            text = paragraph.text.strip()
-            
-            # Skip empty paragraphs
-            if not text:
-                continue
-            
-            # If we have tables, we can start looking for content
-            if table_found:
-                # Look for the "Content Draft" section
-                if text.lower() == 'content draft':
-                    content_section_found = True
-                    continue
-                
-                # Skip other headers and titles
-                if text.lower() in ['blog template document', 'this document follows the blog template format with a table containing metadata fields followed by the content draft.']:
-                    continue
-                
-                # If we've found the content section, start collecting content
-                if content_section_found:
-                    content.append(text)
-        
-        return '\n\n'.join(content)
-    
-    def generate_strapi_layout(self, table_data, content):
-        """Generate Strapi layout JSON"""
-        strapi_data = {
-            "data": {
-                "title": table_data.get("Working Title", ""),
-                "author": table_data.get("Author", ""),
-                "topic": table_data.get("Topic", ""),
-                "blogCategory": table_data.get("Blog Category", ""),
-                "targetKeywords": table_data.get("Target Keywords", ""),
-                "targetAudience": table_data.get("Target Audience", ""),
-                "funnelStage": table_data.get("Funnel Stage", ""),
-                "cta": table_data.get("CTA", ""),
-                "metaDescription": table_data.get("Working Meta Description", ""),
-                "content": content,
-                "publishedAt": datetime.now().isoformat(),
-                "createdAt": datetime.now().isoformat(),
-                "updatedAt": datetime.now().isoformat()
-            }
-        }
-        
-        return strapi_data
+    def default_output_file(self, input_file):
+        """Default output path: input_name_strapi.json in the current directory"""
+        base_name = os.path.splitext(os.path.basename(input_file))[0]
+        return f"{base_name}_strapi.json"
     
     def convert_document(self, input_file, output_file=None, verbose=False):
         """Convert Word document to Strapi layout"""
@@ -109,37 +46,21 @@ class CLIWordToStrapiConverter:
             if verbose:
                 print(f"Processing document: {input_file}")
             
-            # Load the Word document
-            doc = Document(input_file)
-            
-            # Extract table data
-            table_data = self.extract_table_data(doc)
-            
-            if verbose:
-                print(f"Extracted {len(table_data)} fields from table")
-                for field, value in table_data.items():
-                    print(f"  {field}: {value}")
-            
-            # Extract content
-            content = self.extract_content(doc)
-            
-            if verbose:
-                print(f"Extracted content length: {len(content)} characters")
-                print(f"Content preview: {content[:100]}...")
-            
-            # Generate Strapi layout
-            strapi_data = self.generate_strapi_layout(table_data, content)
+            strapi_data = self.convert_to_strapi(input_file, verbose)
             
             # Determine output file
             if output_file is None:
-                base_name = os.path.splitext(os.path.basename(input_file))[0]
-                output_file = f"{base_name}_strapi.json"
+                output_file = self.default_output_file(input_file)
             
-            # Save to file
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(strapi_data, f, indent=2, ensure_ascii=False)
+            # Save to file, unless it has not changed since the last conversion
+            _, changes, previous = self.emit_strapi_file(input_file, strapi_data, output_file)
+            self.last_changes, self.last_previous = changes, previous
             
-            if verbose:
+            if changes == []:
+                print(f"'{input_file}' is unchanged; '{output_file}' was not rewritten")
+            elif verbose:
+                if changes is not None:
+                    print(f"Changed attributes: {', '.join(changes)}")
                 print(f"Strapi layout saved to: {output_file}")
             else:
                 print(f"Successfully converted '{input_file}' to '{output_file}'")
@@ -151,19 +72,963 @@ class CLIWordToStrapiConverter:
             return False
 
 
+# Batch mode
+#
+# Each worker process builds its converter once in the pool initializer and
+# reuses it for every document it is handed.
+
+_worker_converter = None
+_worker_profile = False
+_worker_hash_inputs = False
+
+
+def _init_worker(engine='python-docx', mapping_file=None, cache_dir=None, profile=False,
+                 serializer=None, timestamp=None, media_dir=None, manifest_file=None,
+                 content_format='text', publishing=False, hash_inputs=False):
+    """Process pool initializer: build one converter per worker
+
+    `cache_dir` enables the conversion cache; pass False to disable it.
+    With `profile` each document is profiled and its summary returned.
+    `serializer` encodes the output files and a `timestamp` is stamped on
+    every layout instead of one captured per document. With `media_dir`
+    embedded images are extracted into that shared media store. With
+    `manifest_file` each document is diffed against its last emitted record,
+    and with `publishing` too its records stay pending until published.
+    `content_format` selects plain text, Markdown or Strapi blocks content.
+    With `hash_inputs` each result carries the document's content hash.
+    """
+    global _worker_converter, _worker_profile, _worker_hash_inputs
+    from conversion_cache import ConversionCache
+    cache = ConversionCache(cache_dir) if cache_dir is not False else None
+    _worker_converter = CLIWordToStrapiConverter(engine, mapping_file, cache, serializer, content_format)
+    _worker_converter.timestamp = timestamp
+    if media_dir:
+        from media_extractor import MediaStore
+        _worker_converter.media = MediaStore(media_dir)
+    if manifest_file:
+        from record_manifest import RecordManifest
+        _worker_converter.manifest = RecordManifest(manifest_file)
+    _worker_converter.publishing = publishing
+    _worker_profile = profile
+    _worker_hash_inputs = hash_inputs
+
+
+def _convert_worker(input_file, output_file, data=None, defer_write=False, keep_record=False):
+    """Convert one document inside a worker; never raises
+
+    With `data` (the bytes of an archive member) the document is read from
+    memory and `input_file` only names it. With no `output_file` the Strapi
+    layout is returned under "record" instead of being written. With a
+    manifest the result also lists the changed attributes under "changes"
+    (empty when nothing changed, in which case nothing is written or
+    returned), and the previous record's title under "previous".
+    
+    With `defer_write` the output is serialized but not written: the bytes
+    are returned under "payload" (None for an unchanged document whose
+    output exists) for the caller to write, and with `keep_record` the
+    layout is returned under "record" too.
+    """
+    converter = _worker_converter or CLIWordToStrapiConverter()
+    cache = converter.cache
+    hits = cache.hits if cache is not None else 0
+    media = converter.media
+    written, deduplicated = (media.written, media.deduplicated) if media is not None else (0, 0)
+    converter.profiler = PhaseProfiler() if _worker_profile else None
+    start = time.perf_counter()
+    record = payload = None
+    changes = previous = None
+    input_hash = None
+    try:
+        if _worker_hash_inputs:
+            from conversion_cache import file_digest
+            input_hash = file_digest(io.BytesIO(data) if data is not None else input_file)
+        source = io.BytesIO(data) if data is not None else input_file
+        strapi_data = converter.convert_to_strapi(source)
+        if defer_write:
+            record, changes, previous = converter.reconcile(input_file, strapi_data)
+            payload = None
+            if changes != [] or not os.path.exists(output_file):
+                with profile_phase(converter.profiler, "serialization"):
+                    payload = converter.serialize(record)
+                if changes:
+                    converter.remember(input_file, record)
+            if not keep_record:
+                record = None
+        elif output_file is None:
+            record, changes, previous = converter.reconcile(input_file, strapi_data)
+            if changes:
+                converter.remember(input_file, record)
+                if previous is not None:
+                    from record_manifest import partial_record
+                    record = partial_record(record, changes)
+            elif changes == []:
+                record = None
+        else:
+            _, changes, previous = converter.emit_strapi_file(input_file, strapi_data, output_file)
+        error = None
+    except Exception as e:
+        output_file = None
+        error = f"{type(e).__name__}: {e}"
+    result = {
+        "input": input_file,
+        "output": output_file,
+        "error": error,
+        "duration": time.perf_counter() - start,
+        "cached": cache.hits > hits if cache is not None else None,
+    }
+    if media is not None:
+        result["media_written"] = media.written - written
+        result["media_deduplicated"] = media.deduplicated - deduplicated
+    if input_hash is not None:
+        result["input_hash"] = input_hash
+    if converter.manifest is not None:
+        result["changes"] = changes
+        result["previous"] = {name: previous["data"][name] for name in ('title', 'slug')
+                              if name in previous["data"]} if previous else None
+    if record is not None:
+        result["record"] = record
+    if defer_write:
+        result["payload"] = payload
+    if converter.profiler is not None:
+        result["profile"] = converter.profiler.summary()
+        converter.profiler = None
+    return result
+
+
+def is_batch_input(inputs):
+    """True if the positional inputs call for batch mode"""
+    if len(inputs) != 1:
+        return True
+    return os.path.isdir(inputs[0]) or glob.has_magic(inputs[0]) or is_archive(inputs[0])
+
+
+def collect_input_files(inputs):
+    """Expand files, directories (recursively), glob patterns and archives into .docx inputs
+
+    Each .docx inside a zip or tar archive becomes an "archive!member" input.
+    """
+    found = []
+    for item in inputs:
+        if is_archive(item):
+            matches = [member_input(item, member) for member in list_documents(item)]
+        elif os.path.isdir(item):
+            matches = glob.glob(os.path.join(item, '**', '*.docx'), recursive=True)
+        elif glob.has_magic(item):
+            matches = glob.glob(item, recursive=True)
+        else:
+            matches = [item]
+        
+        for path in sorted(matches):
+            # Skip Word lock files such as "~$draft.docx"
+            if os.path.basename(path).startswith('~$'):
+                continue
+            found.append(path)
+    
+    # Preserve order but drop duplicates from overlapping patterns
+    seen = set()
+    unique = []
+    for path in found:
+        key = os.path.abspath(path)
+        if key not in seen:
+            seen.add(key)
+            unique.append(path)
+    return unique
+
+
+def batch_output_files(input_files, output_dir=None):
+    """Map each input file to its output path
+
+    Without an output directory the JSON is written next to each document;
+    with one, the directory layout below the inputs' common root is mirrored.
+    Archive members are placed as if the archive had been extracted to a
+    folder named after it (drafts.zip!a/post.docx -> drafts/a/post_strapi.json).
+    Inputs that would still share an output path (drafts.zip and
+    drafts.tar.gz both holding post.docx, or drafts.zip next to a drafts/
+    folder) are numbered: plain files keep their name, then archive members
+    in name order get post_2_strapi.json, post_3_strapi.json and so on.
+    """
+    outputs = {}
+    paths = {input_file: output_path_for(input_file) for input_file in input_files}
+    root = None
+    if output_dir and input_files:
+        root = os.path.commonpath([os.path.dirname(os.path.abspath(p)) for p in paths.values()])
+    
+    for input_file, path in paths.items():
+        base_name = os.path.splitext(os.path.basename(path))[0]
+        if output_dir:
+            rel_dir = os.path.relpath(os.path.dirname(os.path.abspath(path)), root)
+            target_dir = os.path.normpath(os.path.join(output_dir, rel_dir))
+        else:
+            target_dir = os.path.dirname(path)
+        outputs[input_file] = os.path.join(target_dir, f"{base_name}_strapi.json")
+    
+    taken = set()
+    for input_file in sorted(outputs, key=lambda name: (split_member(name) is not None, name)):
+        output = outputs[input_file]
+        stem = output[:-len("_strapi.json")]
+        number = 1
+        while os.path.normcase(os.path.abspath(output)) in taken:
+            number += 1
+            output = f"{stem}_{number}_strapi.json"
+        taken.add(os.path.normcase(os.path.abspath(output)))
+        outputs[input_file] = output
+    return outputs
+
+
+def convert_batch(input_files, output_dir=None, jobs=None, verbose=False, engine='python-docx',
+                  mapping_file=None, cache_dir=None, writer=None, metrics=None, serializer=None,
+                  timestamp=None, media_dir=None, manifest_file=None, checkpoint=None,
+                  retry_failed=False, content_format='text', pipeline=None, publishing=False):
+    """Convert many documents across a process pool
+
+    Returns a list of per-file result dicts (input, output, error, duration,
+    cached; None when caching is off). `cache_dir` is handed to the workers
+    (False disables the cache). With a `writer` (e.g. NDJSONWriter) no
+    per-document files are written: each record is passed to
+    `writer.write` as soon as it arrives and is not kept. With `metrics`
+    (a MetricsAggregator) every document is profiled and aggregated.
+    `serializer`, `timestamp`, `media_dir`, `manifest_file`,
+    `content_format` and `publishing` are passed on to the workers' converters; workers share the media store, so an image
+    is stored once per batch. With a `checkpoint` (a BatchManifest) only
+    documents not yet done are converted (failed ones too with
+    `retry_failed`) and each result, with the document's hash taken by its
+    worker, is checkpointed as it arrives. With a
+    `pipeline` (a BatchPipeline, for per-document output files only)
+    reading, converting, writing and publishing run as separate stages.
+    A failing document is recorded and does not stop the rest of the batch.
+    """
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+    
+    if writer is None:
+        outputs = batch_output_files(input_files, output_dir)
+        for output_file in set(outputs.values()):
+            target_dir = os.path.dirname(output_file)
+            if target_dir:
+                os.makedirs(target_dir, exist_ok=True)
+    else:
+        outputs = dict.fromkeys(input_files)
+    
+    if checkpoint is not None:
+        input_files = checkpoint.plan(input_files, outputs, retry_failed)
+    
+    results = []
+    
+    def record(result):
+        profile = result.pop("profile", None)
+        if metrics is not None and profile is not None:
+            metrics.add(profile, ok=not result["error"], duration=result["duration"])
+        strapi_data = result.pop("record", None)
+        if strapi_data is not None:
+            writer.write({"source": result["input"], **strapi_data})
+            result["output"] = writer.path
+        results.append(result)
+        if checkpoint is not None:
+            checkpoint.record(result)
+        if verbose:
+            if result["error"]:
+                print(f"FAILED {result['input']}: {result['error']}")
+            elif result.get("changes") == []:
+                print(f"same   {result['input']} (unchanged, not written)")
+            else:
+                cached = ", cached" if result["cached"] else ""
+                print(f"ok     {result['input']} -> {result['output']} ({result['duration']:.2f}s{cached})")
+    
+    import functools
+    init_kwargs = {"engine": engine, "mapping_file": mapping_file, "cache_dir": cache_dir,
+                   "profile": metrics is not None, "serializer": serializer, "timestamp": timestamp,
+                   "media_dir": media_dir, "manifest_file": manifest_file, "content_format": content_format,
+                   "publishing": publishing, "hash_inputs": checkpoint is not None}
+    initializer = functools.partial(_init_worker, **init_kwargs)
+    
+    if pipeline is not None:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=initializer) as pool:
+            tasks = ((input_file, outputs[input_file], data) for input_file, data in iter_sources(input_files))
+            for result in pipeline.run(pool, tasks):
+                record(result)
+        return results
+    
+    if jobs == 1 or len(input_files) <= 1:
+        _init_worker(**init_kwargs)
+        for input_file, data in iter_sources(input_files):
+            record(_convert_worker(input_file, outputs[input_file], data))
+        return results
+    
+    with ProcessPoolExecutor(max_workers=jobs, initializer=initializer) as pool:
+        # Keep a bounded window of documents in flight so finished results
+        # (and their records) never pile up in memory
+        window = 4 * (jobs or os.cpu_count() or 1)
+        # Archive members are read here, one bounded window ahead of the workers
+        remaining = iter_sources(input_files)
+        pending = set()
+        
+        def submit_more():
+            for input_file, data in remaining:
+                pending.add(pool.submit(_convert_worker, input_file, outputs[input_file], data))
+                if len(pending) >= window:
+                    break
+        
+        submit_more()
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                record(future.result())
+            submit_more()
+    
+    return results
+
+
+def _map_chunks(worker, input_files, jobs, init_kwargs, chunk_size, *worker_args):
+    """Run `worker(chunk, *worker_args)` over chunks of (input_file, data) sources
+
+    Workers are built by _init_worker(**init_kwargs) and return one result per
+    document; the results are returned in a list. Chunks run inline when
+    `jobs` is 1 or there is only one, and otherwise across a pool with a
+    bounded window of chunks in flight.
+    """
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+    
+    sources = iter_sources(input_files)
+    chunks = iter(lambda: list(itertools.islice(sources, chunk_size)), [])
+    results = []
+    
+    if jobs == 1 or len(input_files) <= chunk_size:
+        _init_worker(**init_kwargs)
+        for chunk in chunks:
+            results.extend(worker(chunk, *worker_args))
+        return results
+    
+    import functools
+    initializer = functools.partial(_init_worker, **init_kwargs)
+    with ProcessPoolExecutor(max_workers=jobs, initializer=initializer) as pool:
+        window = 2 * (jobs or os.cpu_count() or 1)
+        pending = set()
+        
+        def submit_more():
+            for chunk in chunks:
+                pending.add(pool.submit(worker, chunk, *worker_args))
+                if len(pending) >= window:
+                    break
+        
+        submit_more()
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                results.extend(future.result())
+            submit_more()
+    
+    return results
+
+
+# Validation
+#
+# Validating a document only reads its template table, which takes about a
+# millisecond, so documents are handed to the workers in chunks.
+
+VALIDATE_CHUNK_SIZE = 32
+
+
+def _validate_worker(sources):
+    """Validate a chunk of (input_file, data) documents inside a worker; never raises"""
+    converter = _worker_converter
+    results = []
+    for input_file, data in sources:
+        result = {"input": input_file, "problems": [], "error": None}
+        try:
+            source = io.BytesIO(data) if data is not None else input_file
+            result["problems"] = converter.validate_document(source)
+        except Exception as e:
+            result["error"] = f"{type(e).__name__}: {e}"
+        results.append(result)
+    return results
+
+
+def validate_batch(input_files, jobs=None, mapping_file=None, chunk_size=VALIDATE_CHUNK_SIZE):
+    """Check the template table of many documents against the mapping's rules
+
+    Returns a list of per-file result dicts (input, problems, error). Only
+    the leading template table of each document is read; nothing is
+    converted or written.
+    """
+    return _map_chunks(_validate_worker, input_files, jobs, {"mapping_file": mapping_file, "cache_dir": False},
+                       chunk_size)
+
+
+def run_validation(args):
+    """Validate the inputs' template tables and print a report; returns the exit code"""
+    try:
+        ConversionCore(mapping_file=args.mapping)
+    except (OSError, ValueError) as e:
+        print(f"Error loading mapping: {str(e)}")
+        return 1
+    
+    input_files = collect_input_files(args.input_file)
+    if not input_files:
+        print("Error: No .docx files found.")
+        return 1
+    
+    start = time.perf_counter()
+    results = validate_batch(input_files, args.jobs, args.mapping)
+    elapsed = time.perf_counter() - start
+    results.sort(key=lambda r: r["input"])
+    
+    invalid = [r for r in results if r["problems"]]
+    failed = [r for r in results if r["error"]]
+    for result in results:
+        if result["error"]:
+            print(f"FAILED  {result['input']}: {result['error']}")
+        elif result["problems"]:
+            print(f"INVALID {result['input']}: {'; '.join(result['problems'])}")
+        elif args.verbose:
+            print(f"ok      {result['input']}")
+    
+    rate = len(results) / elapsed if elapsed > 0 else 0.0
+    print("")
+    print("VALIDATION SUMMARY:")
+    print("=" * 50)
+    print(f"Documents: {len(results)}")
+    print(f"Valid:     {len(results) - len(invalid) - len(failed)}")
+    print(f"Invalid:   {len(invalid)}")
+    print(f"Failed:    {len(failed)}")
+    print(f"Elapsed:   {elapsed:.2f}s ({rate:.1f} docs/sec)")
+    
+    return 1 if invalid or failed else 0
+
+
+# Near-duplicate detection
+#
+# A first pass over the batch computes a MinHash signature of each
+# document's content (filling the conversion cache on the way, so the
+# conversion pass that follows does not extract the documents again) and
+# clusters the signatures with an LSH index.
+
+SIGNATURE_CHUNK_SIZE = 4
+
+_worker_hasher = None
+
+
+def _signature_worker(sources, num_perm, shingle_size):
+    """MinHash signatures of a chunk of (input_file, data) documents inside a worker; never raises
+
+    The signature is None for a document without content.
+    """
+    global _worker_hasher
+    from near_duplicates import MinHasher, content_text, shingle_hashes
+    if _worker_hasher is None or _worker_hasher.num_perm != num_perm:
+        _worker_hasher = MinHasher(num_perm)
+    
+    results = []
+    for input_file, data in sources:
+        result = {"input": input_file, "signature": None, "error": None}
+        try:
+            source = io.BytesIO(data) if data is not None else input_file
+            content = _worker_converter.convert_to_strapi(source)["data"]["content"]
+            result["signature"] = _worker_hasher.signature(shingle_hashes(content_text(content), shingle_size))
+        except Exception as e:
+            result["error"] = f"{type(e).__name__}: {e}"
+        results.append(result)
+    return results
+
+
+def _input_mtime(input_file):
+    """Modification time of an input (of its archive, for an archive member), or 0"""
+    split = split_member(input_file)
+    try:
+        return os.stat(split[0] if split else input_file).st_mtime_ns
+    except OSError:
+        return 0
+
+
+def find_near_duplicates(input_files, jobs=None, engine='python-docx', mapping_file=None, cache_dir=None,
+                         content_format='text', threshold=None):
+    """Group documents whose content is nearly the same
+
+    Returns a list of clusters, each a list of (input_file, similarity)
+    pairs with the newest document (by modification time, then name) first
+    and the others' estimated similarity to it.
+    """
+    from near_duplicates import DEFAULT_NUM_PERM, DEFAULT_SHINGLE_SIZE, DEFAULT_THRESHOLD, LSHIndex, similarity
+    
+    init_kwargs = {"engine": engine, "mapping_file": mapping_file, "cache_dir": cache_dir,
+                   "content_format": content_format}
+    results = _map_chunks(_signature_worker, input_files, jobs, init_kwargs,
+                          SIGNATURE_CHUNK_SIZE, DEFAULT_NUM_PERM, DEFAULT_SHINGLE_SIZE)
+    
+    index = LSHIndex(DEFAULT_NUM_PERM, threshold or DEFAULT_THRESHOLD)
+    for result in results:
+        # Unreadable documents are left to fail in the conversion pass, and
+        # documents without content (no signature) are never grouped
+        if result["signature"] is not None:
+            index.add(result["input"], result["signature"])
+    
+    clusters = []
+    for members in index.clusters():
+        members.sort(key=lambda input_file: (_input_mtime(input_file), input_file), reverse=True)
+        newest = index.signatures[members[0]]
+        clusters.append([(member, similarity(index.signatures[member], newest)) for member in members])
+    clusters.sort()
+    return clusters
+
+
+def apply_near_duplicates(input_files, args):
+    """Report near-duplicate clusters and, with `--near-duplicates skip`, drop all but the newest of each"""
+    cache_dir = False if args.no_cache else (args.cache_dir or None)
+    clusters = find_near_duplicates(input_files, args.jobs, args.engine, args.mapping, cache_dir,
+                                    args.content_format, args.similarity)
+    skip = args.near_duplicates == 'skip'
+    older = sum(len(cluster) - 1 for cluster in clusters)
+    
+    print(f"Near-duplicates: {len(clusters)} clusters, {older} older copies "
+          f"{'skipped' if skip else 'found (converted anyway)'}")
+    for cluster in clusters:
+        print(f"  keep  {cluster[0][0]}")
+        for input_file, score in cluster[1:]:
+            print(f"  {'skip' if skip else 'dup '}  {input_file} ({score:.0%} similar)")
+    
+    if not skip:
+        return input_files
+    skipped = {input_file for cluster in clusters for input_file, _ in cluster[1:]}
+    return [input_file for input_file in input_files if input_file not in skipped]
+
+
+def print_batch_summary(results, elapsed):
+    """Print ok/failed counts, per-file errors and throughput"""
+    failed = [r for r in results if r["error"]]
+    ok_count = len(results) - len(failed)
+    rate = len(results) / elapsed if elapsed > 0 else 0.0
+    
+    print("")
+    print("BATCH SUMMARY:")
+    print("=" * 50)
+    print(f"Documents: {len(results)}")
+    print(f"Converted: {ok_count}")
+    print(f"Failed:    {len(failed)}")
+    print(f"Elapsed:   {elapsed:.2f}s ({rate:.1f} docs/sec)")
+    if any(r.get("cached") is not None for r in results):
+        hits = sum(1 for r in results if r.get("cached"))
+        print(f"Cache:     {hits} hits, {len(results) - hits} misses")
+    if any("changes" in r for r in results):
+        unchanged = sum(1 for r in results if r.get("changes") == [])
+        print(f"Changed:   {ok_count - unchanged} ({unchanged} unchanged, not written)")
+    if any("media_written" in r for r in results):
+        written = sum(r.get("media_written", 0) for r in results)
+        deduplicated = sum(r.get("media_deduplicated", 0) for r in results)
+        print(f"Media:     {written + deduplicated} images, {written} stored, "
+              f"{deduplicated} duplicates skipped")
+    
+    if failed:
+        print("")
+        print("Errors:")
+        for result in sorted(failed, key=lambda r: r["input"]):
+            print(f"  {result['input']}: {result['error']}")
+
+
+def batch_exit_code(results):
+    """0 if everything converted, 2 on partial failure, 1 if nothing converted"""
+    failed = sum(1 for r in results if r["error"])
+    if not results or failed == len(results):
+        return 1
+    return 2 if failed else 0
+
+
+def publish_outputs(output_files, publisher, changed=None, previous=None):
+    """Publish converted JSON files to Strapi and print a summary; returns the results
+
+    `changed` and `previous` (lists parallel to `output_files`) limit updates
+    to the changed attributes, as in StrapiPublisher.publish.
+    """
+    from strapi_publisher import print_publish_summary
+    
+    def records():
+        for output_file in output_files:
+            with open(output_file, 'r', encoding='utf-8') as f:
+                yield json.load(f)
+    
+    try:
+        results = publisher.publish_many(records(), changed, previous)
+    finally:
+        publisher.close()
+    print_publish_summary(results, publisher)
+    return results
+
+
+def report_metrics(metrics, args):
+    """Print the profile table and/or write the metrics file requested on the command line"""
+    if metrics is None:
+        return
+    if args.profile:
+        metrics.print_table()
+    if args.metrics_file:
+        metrics.write(args.metrics_file, args.metrics_format)
+        print(f"Metrics saved to: {args.metrics_file}")
+
+
+def run_stream_batch(args, metrics=None, timestamp=None, manifest_file=None):
+    """Convert the inputs into one NDJSON stream or Strapi export archive; returns the exit code"""
+    input_files = collect_input_files(args.input_file)
+    if not input_files:
+        print("Error: No .docx files found.", file=sys.stderr)
+        return 1
+    
+    cache_dir = False if args.no_cache else (args.cache_dir or None)
+    start = time.perf_counter()
+    target = args.export or args.ndjson
+    
+    with contextlib.ExitStack() as stack:
+        media_dir = args.media_dir
+        if args.export:
+            from strapi_export import StrapiExportWriter
+            # The export carries the images, so they need a store even without --media-dir
+            if media_dir is None:
+                import tempfile
+                media_dir = stack.enter_context(tempfile.TemporaryDirectory(prefix='strapi-export-media-'))
+            writer = StrapiExportWriter(args.export, args.collection, args.export_type,
+                                        backend=args.json_backend)
+        else:
+            from ndjson_writer import NDJSONWriter
+            writer = NDJSONWriter(args.ndjson, compress=args.gzip, backend=args.json_backend)
+        
+        # Open the stream first: when the records go to stdout, everything
+        # else is redirected to stderr
+        with writer:
+            log = sys.stderr if target == '-' else sys.stdout
+            with contextlib.redirect_stdout(log):
+                if args.near_duplicates:
+                    input_files = apply_near_duplicates(input_files, args)
+                results = convert_batch(input_files, None, args.jobs, args.verbose, args.engine,
+                                        args.mapping, cache_dir, writer, metrics, timestamp=timestamp,
+                                        media_dir=media_dir, manifest_file=manifest_file,
+                                        content_format=args.content_format)
+    
+    with contextlib.redirect_stdout(log):
+        print_batch_summary(results, time.perf_counter() - start)
+        destination = 'stdout' if target == '-' else target
+        if args.export:
+            print(f"Export:    {writer.count} records, {writer.media_count} media files "
+                  f"as {writer.content_type} -> {destination}")
+        else:
+            print(f"NDJSON:    {writer.count} records, {writer.bytes_written:,} bytes -> {destination}")
+        report_metrics(metrics, args)
+    
+    return batch_exit_code(results)
+
+
 def main():
     """Main function"""
+    # `cli_converter.py serve ...` runs the HTTP conversion service instead
+    if sys.argv[1:2] == ['serve']:
+        from conversion_server import main as serve_main
+        serve_main(sys.argv[2:])
+        return
+    
     parser = argparse.ArgumentParser(description='Convert Word documents to Strapi layouts')
-    parser.add_argument('input_file', help='Input Word document (.docx)')
+    parser.add_argument('input_file', nargs='+',
+                        help='Input Word document (.docx), or directories/glob patterns for batch mode')
     parser.add_argument('-o', '--output', help='Output JSON file (default: input_name_strapi.json)')
     parser.add_argument('-v', '--verbose', action='store_true', help='Verbose output')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='Batch mode: number of worker processes (default: CPU count)')
+    parser.add_argument('--output-dir',
+                        help='Batch mode: directory for JSON output (default: next to each document)')
+    parser.add_argument('--ndjson', metavar='PATH',
+                        help='Write all records to one NDJSON stream (one compact record per line) '
+                             'instead of per-document files; "-" for stdout')
+    parser.add_argument('--gzip', action='store_true',
+                        help='NDJSON: gzip-compress the stream on the fly')
+    parser.add_argument('--export', metavar='PATH',
+                        help='Write all records, and their images, to one Strapi data-transfer archive '
+                             '(.tar.gz) for `strapi import`; "-" for stdout')
+    parser.add_argument('--export-type', metavar='UID',
+                        help='Export: content type the records are imported as '
+                             '(default: derived from --collection, e.g. api::article.article)')
+    parser.add_argument('--watch', action='store_true',
+                        help='Keep running and reconvert new or modified documents in the given directories')
+    parser.add_argument('--poll-interval', type=float, default=1.0,
+                        help='Watch mode: seconds between folder scans (default: 1)')
+    parser.add_argument('--debounce', type=float, default=2.0,
+                        help='Watch mode: seconds a file must stay unchanged before converting (default: 2)')
+    parser.add_argument('--engine', choices=ENGINES, default='python-docx',
+                        help='Document reader: python-docx object model, or a single-pass '
+                             'streaming XML reader (default: python-docx)')
+    parser.add_argument('--content-format', choices=CONTENT_FORMATS, default='text',
+                        help='Content draft output: plain text, Markdown, or Strapi rich-text blocks '
+                             '(keeps headings, lists, bold/italic and links; default: text)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Always reconvert, ignoring the conversion cache')
+    parser.add_argument('--clear-cache', action='store_true',
+                        help='Empty the conversion cache before converting')
+    parser.add_argument('--cache-dir',
+                        help='Conversion cache directory (default: ~/.cache/word_to_strapi)')
+    parser.add_argument('--publish', metavar='STRAPI_URL',
+                        help='Upsert converted entries into Strapi at this base URL (e.g. http://localhost:1337)')
+    parser.add_argument('--collection', default='articles',
+                        help='Publish/export: Strapi collection API name (default: articles)')
+    parser.add_argument('--token', default=os.environ.get('STRAPI_API_TOKEN'),
+                        help='Publish: Strapi API token (default: $STRAPI_API_TOKEN)')
+    parser.add_argument('--upsert-field', choices=('title', 'slug'), default='title',
+                        help='Publish: attribute used to find an existing entry (default: title)')
+    parser.add_argument('--publish-concurrency', type=int, default=4,
+                        help='Publish: concurrent requests / pooled connections (default: 4)')
+    parser.add_argument('--publish-rate', type=float, default=None,
+                        help='Publish: maximum requests per second (default: unlimited)')
+    parser.add_argument('--profile', action='store_true',
+                        help='Record time and memory allocation per conversion phase and print a table')
+    parser.add_argument('--metrics-file',
+                        help='Write per-phase metrics aggregated over the run to this file')
+    parser.add_argument('--metrics-format', choices=('json', 'prometheus'),
+                        help='Metrics file format (default: prometheus for .prom/.txt, otherwise json)')
+    parser.add_argument('--mapping',
+                        help='json5 file mapping template labels to Strapi attributes '
+                             '(default: template_mapping.json5)')
+    parser.add_argument('--json-backend', choices=BACKENDS, default='auto',
+                        help='JSON encoder: orjson, the standard library json module, or auto '
+                             '(orjson when installed; default: auto)')
+    parser.add_argument('--compact', action='store_true',
+                        help='Write JSON files without indentation or whitespace')
+    parser.add_argument('--media-dir',
+                        help='Extract embedded images into this folder (stored once per unique image) '
+                             'and reference them in the output under "media"')
+    parser.add_argument('--timestamp', choices=('document', 'batch'), default='document',
+                        help='Capture publishedAt/createdAt/updatedAt once per document, or once '
+                             'for the whole run (default: document)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Diff each document against the record last emitted for it: unchanged '
+                             'documents are not written, NDJSON and --publish carry only changed '
+                             'attributes, and createdAt/publishedAt are kept')
+    parser.add_argument('--manifest',
+                        help='Incremental: manifest of emitted records '
+                             '(default: ~/.cache/word_to_strapi/manifest.sqlite3)')
+    parser.add_argument('--checkpoint', metavar='PATH',
+                        help='Batch mode: record per-document progress in this SQLite file and, '
+                             'when rerun, skip documents already converted')
+    parser.add_argument('--retry-failed', action='store_true',
+                        help='Checkpoint: also reconvert documents that failed before')
+    parser.add_argument('--pipeline', action='store_true',
+                        help='Batch mode: run reading, converting, writing and publishing as separate '
+                             'stages connected by bounded queues, and report each stage\'s load')
+    parser.add_argument('--readers', type=int, default=2,
+                        help='Pipeline: threads reading documents (default: 2)')
+    parser.add_argument('--writers', type=int, default=2,
+                        help='Pipeline: threads writing output files (default: 2)')
+    parser.add_argument('--queue-size', type=int, default=None,
+                        help='Pipeline: documents buffered between stages (default: twice --jobs)')
+    parser.add_argument('--near-duplicates', choices=('report', 'skip'),
+                        help='Batch mode: find documents whose content is nearly the same (MinHash/LSH) '
+                             'and report them, or skip all but the newest of each group')
+    parser.add_argument('--similarity', type=float, default=None,
+                        help='Near-duplicates: minimum estimated content similarity, 0-1 (default: 0.8)')
+    parser.add_argument('--validate', action='store_true',
+                        help='Only check each template table against the mapping\'s required fields and '
+                             'length limits; nothing is converted. Exits 1 if any document has problems')
     
     args = parser.parse_args()
     
-    converter = CLIWordToStrapiConverter()
-    success = converter.convert_document(args.input_file, args.output, args.verbose)
+    if args.gzip and not args.ndjson:
+        parser.error('--gzip applies to --ndjson output')
+    if args.export and (args.ndjson or args.watch or args.output or args.output_dir or args.publish
+                        or args.incremental or args.checkpoint):
+        parser.error('--export cannot be combined with --ndjson, -o, --output-dir, --watch, --publish, '
+                     '--incremental or --checkpoint')
+    if args.export_type and not args.export:
+        parser.error('--export-type applies to --export')
+    if args.similarity is not None and not args.near_duplicates:
+        parser.error('--similarity applies to --near-duplicates')
+    if args.similarity is not None and not 0 < args.similarity <= 1:
+        parser.error('--similarity must be between 0 and 1')
+    if args.near_duplicates and (args.watch or args.validate or not is_batch_input(args.input_file)):
+        parser.error('--near-duplicates applies to batch mode')
+    if args.pipeline and (args.ndjson or args.export or args.watch or args.validate
+                          or not is_batch_input(args.input_file)):
+        parser.error('--pipeline applies to batch mode with per-document output files')
+    if not args.pipeline and (args.readers != 2 or args.writers != 2 or args.queue_size is not None):
+        parser.error('--readers, --writers and --queue-size apply to --pipeline')
+    if min(args.readers, args.writers, args.queue_size or 1) < 1:
+        parser.error('--readers, --writers and --queue-size must be at least 1')
+    if args.ndjson and (args.watch or args.output or args.output_dir or args.publish):
+        parser.error('--ndjson cannot be combined with -o, --output-dir, --watch or --publish')
+    if args.checkpoint and (args.ndjson or args.watch):
+        parser.error('--checkpoint cannot be combined with --ndjson or --watch')
+    if args.retry_failed and not args.checkpoint:
+        parser.error('--retry-failed applies to --checkpoint')
+    if args.checkpoint and not is_batch_input(args.input_file):
+        parser.error('--checkpoint applies to batch mode')
+    if args.checkpoint and any(is_archive(path) for path in args.input_file):
+        parser.error('--checkpoint cannot be combined with archive inputs')
+    if args.validate:
+        if (args.output or args.output_dir or args.ndjson or args.export or args.watch or args.publish
+                or args.checkpoint or args.incremental):
+            parser.error('--validate cannot be combined with output, --watch, --publish, '
+                         '--checkpoint or --incremental options')
+        if args.jobs is not None and args.jobs < 1:
+            parser.error('--jobs must be at least 1')
+        sys.exit(run_validation(args))
+    
+    if args.content_format != 'text' and args.engine == 'stream':
+        parser.error('--content-format markdown/blocks needs the python-docx engine')
+    
+    try:
+        serializer = JSONSerializer(args.json_backend, args.compact)
+    except ValueError as e:
+        parser.error(str(e))
+    timestamp = datetime.now().isoformat() if args.timestamp == 'batch' else None
+    
+    if args.manifest and not args.incremental:
+        parser.error('--manifest applies to --incremental')
+    manifest_file = None
+    if args.incremental:
+        from record_manifest import DEFAULT_MANIFEST_FILE, RecordManifest
+        manifest_file = args.manifest or DEFAULT_MANIFEST_FILE
+    
+    publisher = None
+    if args.publish:
+        if args.watch:
+            parser.error('--publish cannot be combined with --watch')
+        from strapi_publisher import StrapiPublisher
+        try:
+            publisher = StrapiPublisher(args.publish, args.collection, args.token,
+                                        concurrency=max(1, args.publish_concurrency),
+                                        rate=args.publish_rate, upsert_field=args.upsert_field)
+        except ValueError as e:
+            parser.error(str(e))
+    
+    cache = None
+    if args.clear_cache or not args.no_cache:
+        from conversion_cache import ConversionCache
+        cache = ConversionCache(args.cache_dir)
+        if args.clear_cache:
+            cache.clear()
+            if args.verbose:
+                print(f"Cleared conversion cache: {cache.path}")
+        if args.no_cache:
+            cache = None
+    
+    try:
+        converter = CLIWordToStrapiConverter(args.engine, args.mapping, cache, serializer, args.content_format)
+    except (OSError, ValueError) as e:
+        print(f"Error loading mapping: {str(e)}")
+        sys.exit(1)
+    converter.timestamp = timestamp
+    if args.media_dir:
+        from media_extractor import MediaStore
+        converter.media = MediaStore(args.media_dir)
+    if manifest_file:
+        converter.manifest = RecordManifest(manifest_file)
+    converter.publishing = publisher is not None
+    
+    if args.watch:
+        not_dirs = [path for path in args.input_file if not os.path.isdir(path)]
+        if not_dirs:
+            parser.error(f"--watch takes directories: {', '.join(not_dirs)}")
+        from folder_watcher import FolderWatcher
+        watcher = FolderWatcher(args.input_file, converter, args.poll_interval, args.debounce, args.verbose)
+        watcher.run()
+        sys.exit(0)
+    
+    metrics = MetricsAggregator() if args.profile or args.metrics_file else None
+    
+    if args.ndjson or args.export:
+        sys.exit(run_stream_batch(args, metrics, timestamp, manifest_file))
+    
+    if not is_batch_input(args.input_file):
+        input_file = args.input_file[0]
+        if metrics is not None:
+            converter.profiler = PhaseProfiler()
+        start = time.perf_counter()
+        success = converter.convert_document(input_file, args.output, args.verbose)
+        if cache is not None:
+            print(f"Cache: {cache.hits} hits, {cache.misses} misses")
+        if converter.media is not None:
+            print(f"Media: {converter.media.written} stored, {converter.media.deduplicated} duplicates skipped "
+                  f"in {args.media_dir}")
+        if metrics is not None:
+            metrics.add(converter.profiler.summary(), ok=success, duration=time.perf_counter() - start)
+            report_metrics(metrics, args)
+        if success and publisher is not None and converter.last_changes != []:
+            output_file = args.output or converter.default_output_file(input_file)
+            changed = [converter.last_changes] if converter.last_previous else None
+            previous = [converter.last_previous["data"]] if converter.last_previous else None
+            published = publish_outputs([output_file], publisher, changed, previous)
+            success = not any(r["error"] for r in published)
+            if success and converter.manifest is not None:
+                converter.manifest.mark_published([input_file])
+        sys.exit(0 if success else 1)
+    
+    if args.output:
+        parser.error('-o/--output names a single file; use --output-dir in batch mode')
+    if args.jobs is not None and args.jobs < 1:
+        parser.error('--jobs must be at least 1')
+    
+    input_files = collect_input_files(args.input_file)
+    if not input_files:
+        print("Error: No .docx files found.")
+        sys.exit(1)
+    
+    start = time.perf_counter()
+    if args.near_duplicates:
+        input_files = apply_near_duplicates(input_files, args)
+    
+    checkpoint = None
+    if args.checkpoint:
+        from batch_manifest import BatchManifest
+        checkpoint = BatchManifest(args.checkpoint)
+    
+    pipeline = None
+    if args.pipeline:
+        import functools
+        from batch_pipeline import BatchPipeline
+        # Publishing runs as the pipeline's last stage, so workers hand back each record
+        convert = functools.partial(_convert_worker, defer_write=True, keep_record=publisher is not None)
+        pipeline = BatchPipeline(convert, args.jobs or os.cpu_count() or 1, args.readers, args.writers,
+                                 args.queue_size, publisher=publisher)
+    
+    cache_dir = False if args.no_cache else (args.cache_dir or None)
+    try:
+        results = convert_batch(input_files, args.output_dir, args.jobs, args.verbose, args.engine,
+                                args.mapping, cache_dir, metrics=metrics, serializer=serializer,
+                                timestamp=timestamp, media_dir=args.media_dir, manifest_file=manifest_file,
+                                checkpoint=checkpoint, retry_failed=args.retry_failed,
+                                content_format=args.content_format, pipeline=pipeline,
+                                publishing=publisher is not None)
+    finally:
+        if checkpoint is not None:
+            checkpoint.close()
+    elapsed = time.perf_counter() - start
+    print_batch_summary(results, elapsed)
+    if pipeline is not None:
+        from batch_pipeline import print_pipeline_summary
+        print_pipeline_summary(pipeline.summary(elapsed))
+    report_metrics(metrics, args)
+    exit_code = batch_exit_code(results)
+    
+    if checkpoint is not None:
+        print(f"Checkpoint: {checkpoint.skipped_done} already done, "
+              f"{checkpoint.skipped_failed} earlier failures skipped"
+              f"{' (rerun with --retry-failed)' if checkpoint.skipped_failed else ''}")
+        if not results:
+            exit_code = 2 if checkpoint.skipped_failed else 0
+    
+    if publisher is not None:
+        if pipeline is not None:
+            from strapi_publisher import print_publish_summary
+            publisher.close()
+            emitted = [r for r in results if "published" in r]
+            published = [r["published"] for r in emitted]
+            print_publish_summary(published, publisher)
+        else:
+            # Unchanged documents are already published as they are
+            emitted = [r for r in results if not r["error"] and r.get("changes") != []]
+            changed = [r["changes"] if r.get("previous") else None for r in emitted]
+            previous = [r.get("previous") for r in emitted]
+            published = publish_outputs([r["output"] for r in emitted], publisher, changed, previous)
+        if manifest_file:
+            # Records stay pending in the manifest, and are published again, until this succeeds
+            manifest = RecordManifest(manifest_file)
+            manifest.mark_published([r["input"] for r, outcome in zip(emitted, published) if not outcome["error"]])
+            manifest.close()
+        if any(r["error"] for r in published) and exit_code == 0:
+            exit_code = 2
     
-    sys.exit(0 if success else 1)
+    # 0 = all converted, 2 = partial failure, 1 = nothing converted
+    sys.exit(exit_code)
 
 
 if __name__ == "__main__":
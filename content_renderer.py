@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Content Renderer
+Renders the content draft to Markdown or Strapi rich-text blocks, keeping its formatting
+"""
+
+import re
+
+from lxml import etree
+
+from docx_stream_reader import HYPERLINK, R, RUN_TEXT, W
+
+
+R_ID = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id'
+
+# Inline formatting kept from runs, in Markdown nesting order (outermost first)
+MARKS = ('bold', 'italic', 'underline', 'strikethrough', 'code')
+MARKDOWN_MARKERS = {'bold': '**', 'italic': '*', 'strikethrough': '~~'}
+
+# Direct run properties and the mark each one sets
+RUN_PROPERTIES = {W + 'b': 'bold', W + 'i': 'italic', W + 'strike': 'strikethrough', W + 'dstrike': 'strikethrough'}
+CHARACTER_STYLES = {'strong': 'bold', 'emphasis': 'italic', 'htmlcode': 'code', 'verbatimchar': 'code'}
+MONOSPACE_FONTS = {'courier', 'courier new', 'consolas', 'menlo', 'monaco', 'lucida console', 'source code pro'}
+
+OFF_VALUES = ('0', 'false', 'off', 'none')
+HEADING_STYLE = re.compile(r'heading (\d)$')
+LIST_STYLE = re.compile(r'list (bullet|number)(?: (\d))?$')
+
+MARKDOWN_ESCAPE = re.compile(r'([\\`*_\[\]])')
+MARKDOWN_BLOCK_START = re.compile(r'^([#>+-]|\d+[.)])(?=\s|$)')
+
+# Numbering lookups; ids are passed as XPath variables, never spliced into the expression
+NAMESPACES = {'w': W[1:-1]}
+ABSTRACT_NUM_ID = etree.XPath('w:num[@w:numId=$num_id]/w:abstractNumId/@w:val', namespaces=NAMESPACES)
+LEVEL_FORMAT = etree.XPath('w:abstractNum[@w:abstractNumId=$abstract_id]/w:lvl[@w:ilvl=$ilvl]/w:numFmt/@w:val',
+                           namespaces=NAMESPACES)
+
+
+def _toggle(element):
+    """Value of an on/off run property element (absent means off)"""
+    return element is not None and element.get(W + 'val', 'true').lower() not in OFF_VALUES
+
+
+class ContentRenderer:
+    """Renders content draft paragraphs as Markdown or Strapi rich-text blocks
+
+    Paragraphs are fed as w:p elements in document order; which ones belong
+    to the content draft is decided exactly as for plain text (see
+    ContentCollector). Each paragraph's runs are read once: adjacent runs
+    with identical formatting are merged into one span, headings, quotes and
+    list items are recognized from the paragraph style and numbering, and
+    the output is accumulated in lists and joined once, so rendering stays
+    linear however long the draft.
+
+    `document` is the python-docx Document the paragraphs come from; it
+    resolves style names, list numbering formats and hyperlink targets.
+    """
+
+    def __init__(self, output_format, document, collector):
+        if output_format not in ('markdown', 'blocks'):
+            raise ValueError(f"Unknown content format '{output_format}'")
+        self.output_format = output_format
+        self.collector = collector
+        self.part = document.part
+        self.styles = document.styles.element
+        try:
+            self.numbering = self.part.numbering_part.element
+        except (KeyError, NotImplementedError):
+            self.numbering = None
+
+        self._style_cache = {}
+        self._numbering_cache = {}
+
+        # Markdown: rendered blocks and the separators between them
+        self.parts = []
+        self.counters = []
+        self.in_list = False
+        # Blocks: top-level nodes and the open lists, outermost first
+        self.blocks = []
+        self.list_stack = []
+
+    def feed(self, paragraph):
+        """Consider one body paragraph (a w:p element)"""
+        spans = self.paragraph_spans(paragraph)
+        if not self.collector.accepts(''.join(''.join(pieces) for _, _, pieces in spans)):
+            return
+        spans = self._strip(spans)
+        kind, level, ordered = self.paragraph_kind(paragraph)
+        if self.output_format == 'markdown':
+            self._markdown_block(kind, level, ordered, spans)
+        else:
+            self._blocks_node(kind, level, ordered, spans)
+
+    def result(self):
+        """The rendered content: a Markdown string, or a list of block nodes"""
+        if self.output_format == 'markdown':
+            return ''.join(self.parts)
+        return self.blocks
+
+    # Runs
+
+    def paragraph_spans(self, paragraph):
+        """[marks, url, [text pieces]] for each run of uniform formatting"""
+        spans = []
+        for child in paragraph:
+            if child.tag == R:
+                self._add_run(spans, child, None)
+            elif child.tag == HYPERLINK:
+                url = self._hyperlink_url(child)
+                for run in child:
+                    if run.tag == R:
+                        self._add_run(spans, run, url)
+        return spans
+
+    def _add_run(self, spans, run, url):
+        pieces = []
+        marks = ()
+        for child in run:
+            tag = child.tag
+            if tag == W + 't':
+                pieces.append(child.text or '')
+            elif tag == W + 'br':
+                if child.get(W + 'type', 'textWrapping') == 'textWrapping':
+                    pieces.append('\n')
+            elif tag in RUN_TEXT:
+                pieces.append(RUN_TEXT[tag])
+            elif tag == W + 'rPr':
+                marks = self._run_marks(child)
+        if not pieces:
+            return
+        if spans and spans[-1][0] == marks and spans[-1][1] == url:
+            spans[-1][2].extend(pieces)
+        else:
+            spans.append([marks, url, pieces])
+
+    @staticmethod
+    def _run_marks(properties):
+        found = set()
+        for child in properties:
+            tag = child.tag
+            if tag in RUN_PROPERTIES:
+                if _toggle(child):
+                    found.add(RUN_PROPERTIES[tag])
+            elif tag == W + 'u':
+                if _toggle(child):
+                    found.add('underline')
+            elif tag == W + 'rStyle':
+                mark = CHARACTER_STYLES.get((child.get(W + 'val') or '').lower())
+                if mark:
+                    found.add(mark)
+            elif tag == W + 'rFonts':
+                if (child.get(W + 'ascii') or '').lower() in MONOSPACE_FONTS:
+                    found.add('code')
+        return tuple(mark for mark in MARKS if mark in found)
+
+    def _hyperlink_url(self, hyperlink):
+        rel_id = hyperlink.get(R_ID)
+        if rel_id and rel_id in self.part.rels:
+            url = self.part.rels[rel_id].target_ref
+        else:
+            url = ''
+        anchor = hyperlink.get(W + 'anchor')
+        return f"{url}#{anchor}" if anchor else url or None
+
+    @staticmethod
+    def _strip(spans):
+        """Trim the paragraph's leading and trailing whitespace, as the plain text is"""
+        spans = [[marks, url, ''.join(pieces)] for marks, url, pieces in spans]
+        while spans and not spans[0][2].strip():
+            spans.pop(0)
+        while spans and not spans[-1][2].strip():
+            spans.pop()
+        if spans:
+            spans[0][2] = spans[0][2].lstrip()
+            spans[-1][2] = spans[-1][2].rstrip()
+        return spans
+
+    # Paragraph kinds
+
+    def paragraph_kind(self, paragraph):
+        """(kind, level, ordered): kind is paragraph, heading, quote or list-item"""
+        properties = paragraph.find(W + 'pPr')
+        style_id = num_id = ilvl = None
+        if properties is not None:
+            style = properties.find(W + 'pStyle')
+            if style is not None:
+                style_id = style.get(W + 'val')
+            numbering = properties.find(W + 'numPr')
+            if numbering is not None:
+                num_id, ilvl = self._numbering_ids(numbering)
+
+        kind, level, style_num_id = self._style_kind(style_id)
+        if num_id is None:
+            num_id = style_num_id
+        if kind == 'list-item' or (num_id not in (None, '0') and kind == 'paragraph'):
+            if ilvl is None:
+                ilvl = level or 0
+            return 'list-item', ilvl, self._is_ordered(num_id, ilvl, style_id)
+        return kind, level, False
+
+    @staticmethod
+    def _numbering_ids(numbering):
+        num_id = numbering.find(W + 'numId')
+        ilvl = numbering.find(W + 'ilvl')
+        return (num_id.get(W + 'val') if num_id is not None else None,
+                int(ilvl.get(W + 'val', '0')) if ilvl is not None else None)
+
+    def _style_kind(self, style_id):
+        """(kind, level, numId) implied by a paragraph style, cached per style"""
+        if style_id in self._style_cache:
+            return self._style_cache[style_id]
+        kind, level, num_id = 'paragraph', 0, None
+        style = self.styles.get_by_id(style_id) if style_id else None
+        if style is not None:
+            name = (style.name_val or '').lower()
+            heading = HEADING_STYLE.match(name)
+            listed = LIST_STYLE.match(name)
+            if heading:
+                kind, level = 'heading', min(int(heading.group(1)), 6) or 1
+            elif name == 'title':
+                kind, level = 'heading', 1
+            elif name in ('quote', 'intense quote'):
+                kind = 'quote'
+            elif listed:
+                kind, level = 'list-item', int(listed.group(2) or 1) - 1
+            properties = style.find(W + 'pPr')
+            numbering = properties.find(W + 'numPr') if properties is not None else None
+            if numbering is not None:
+                num_id = self._numbering_ids(numbering)[0]
+        self._style_cache[style_id] = kind, level, num_id
+        return kind, level, num_id
+
+    def _is_ordered(self, num_id, ilvl, style_id):
+        """True unless the list level's number format is a bullet"""
+        key = (num_id, ilvl)
+        if key not in self._numbering_cache:
+            fmt = None
+            if self.numbering is not None and num_id not in (None, '0'):
+                abstract = ABSTRACT_NUM_ID(self.numbering, num_id=num_id)
+                if abstract:
+                    formats = LEVEL_FORMAT(self.numbering, abstract_id=abstract[0], ilvl=str(ilvl))
+                    fmt = formats[0] if formats else None
+            if fmt is None:
+                style = self.styles.get_by_id(style_id) if style_id else None
+                fmt = 'decimal' if style is not None and 'number' in (style.name_val or '').lower() else 'bullet'
+            self._numbering_cache[key] = fmt != 'bullet'
+        return self._numbering_cache[key]
+
+    # Markdown
+
+    def _markdown_block(self, kind, level, ordered, spans):
+        inline = self._markdown_inline(spans)
+        if kind == 'list-item':
+            # counters holds [ordered, items so far] for each open list level
+            del self.counters[level + 1:]
+            same_list = self.in_list and len(self.counters) == level + 1 and self.counters[level][0] == ordered
+            if len(self.counters) == level + 1 and self.counters[level][0] != ordered:
+                self.counters.pop()
+            while len(self.counters) < level + 1:
+                self.counters.append([ordered, 0])
+            self.counters[level][1] += 1
+            marker = f"{self.counters[level][1]}." if ordered else '-'
+            if self.parts:
+                # A list of the other kind at the top level must start a new block
+                self.parts.append('\n\n' if not self.in_list or (level == 0 and not same_list) else '\n')
+            self.parts.append(f"{'   ' * level}{marker} {inline}")
+            self.in_list = True
+            return
+
+        self.counters = []
+        self.in_list = False
+        if self.parts:
+            self.parts.append('\n\n')
+        if kind == 'heading':
+            self.parts.append(f"{'#' * level} {inline}")
+        elif kind == 'quote':
+            self.parts.append('> ' + inline.replace('\n', '\n> '))
+        else:
+            self.parts.append(MARKDOWN_BLOCK_START.sub(r'\\\1', inline))
+
+    @staticmethod
+    def _markdown_inline(spans):
+        out = []
+        index = 0
+        while index < len(spans):
+            url = spans[index][1]
+            end = index + 1
+            while url and end < len(spans) and spans[end][1] == url:
+                end += 1
+            text = ''.join(ContentRenderer._markdown_span(marks, text) for marks, _, text in spans[index:end])
+            out.append(f"[{text}]({url})" if url else text)
+            index = end
+        return ''.join(out).replace('\n', '\\\n')
+
+    @staticmethod
+    def _markdown_span(marks, text):
+        if 'code' in marks:
+            core = text.strip()
+            body = f"`{core}`" if core else ''
+        else:
+            core = text.strip()
+            body = MARKDOWN_ESCAPE.sub(r'\\\1', core)
+        if not core:
+            return text
+        for mark in reversed(MARKS):
+            marker = MARKDOWN_MARKERS.get(mark)
+            if marker and mark in marks:
+                body = f"{marker}{body}{marker}"
+        lead = text[:len(text) - len(text.lstrip())]
+        trail = text[len(text.rstrip()):]
+        return f"{lead}{body}{trail}"
+
+    # Strapi blocks
+
+    def _blocks_node(self, kind, level, ordered, spans):
+        children = self._block_children(spans)
+        if kind != 'list-item':
+            self.list_stack = []
+            if kind == 'heading':
+                self.blocks.append({"type": "heading", "level": level, "children": children})
+            else:
+                self.blocks.append({"type": kind, "children": children})
+            return
+
+        list_format = 'ordered' if ordered else 'unordered'
+        stack = self.list_stack
+        del stack[level + 1:]
+        # Only a list at this item's own level can be of the other kind; a
+        # shorter stack ends at the parent level, which the item nests under
+        if len(stack) == level + 1 and stack[-1]["format"] != list_format:
+            stack.pop()
+        while len(stack) < level + 1:
+            node = {"type": "list", "format": list_format, "children": []}
+            if stack:
+                node["indentLevel"] = len(stack)
+                stack[-1]["children"].append(node)
+            else:
+                self.blocks.append(node)
+            stack.append(node)
+        stack[-1]["children"].append({"type": "list-item", "children": children})
+
+    @staticmethod
+    def _block_children(spans):
+        children = []
+        for marks, url, text in spans:
+            node = {"type": "text", "text": text}
+            for mark in marks:
+                node[mark] = True
+            if url is None:
+                children.append(node)
+            elif children and children[-1]["type"] == 'link' and children[-1]["url"] == url:
+                children[-1]["children"].append(node)
+            else:
+                children.append({"type": "link", "url": url, "children": [node]})
+        # Strapi requires at least one text node
+        return children or [{"type": "text", "text": ""}]
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Conversion Cache
+Persistent on-disk cache of Strapi layouts keyed by .docx content hash
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+
+DEFAULT_CACHE_DIR = os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+    'word_to_strapi'
+)
+DEFAULT_MAX_ENTRIES = 10000
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_digest(path):
+    """SHA-256 of a file's contents, read in chunks
+
+    `path` may also be a seekable binary file object, which is left at the
+    position it had.
+    """
+    digest = hashlib.sha256()
+    if hasattr(path, 'read'):
+        position = path.tell()
+        for chunk in iter(lambda: path.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+        path.seek(position)
+        return digest.hexdigest()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ConversionCache:
+    """SQLite-backed LRU cache of Strapi layouts
+
+    Entries are keyed by the document's content hash combined with a salt
+    (converter version and mapping fingerprint), so editing the document,
+    upgrading the converter or changing the mapping all miss. The cache is
+    trimmed to `max_entries` and `max_bytes` after each store, evicting the
+    least recently used entries first. Several processes may share one cache.
+    """
+    
+    def __init__(self, cache_dir=None, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.path = os.path.join(self.cache_dir, 'conversions.sqlite3')
+        self._db = sqlite3.connect(self.path, timeout=30)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS entries ('
+            ' key TEXT PRIMARY KEY,'
+            ' data TEXT NOT NULL,'
+            ' size INTEGER NOT NULL,'
+            ' last_used REAL NOT NULL)'
+        )
+        self._db.execute('CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)')
+        self._db.commit()
+    
+    def key_for(self, input_file, salt=''):
+        """Cache key for a document: content hash plus salt"""
+        return hashlib.sha256(f"{file_digest(input_file)}:{salt}".encode('utf-8')).hexdigest()
+    
+    def get(self, key):
+        """Return the cached Strapi layout for `key`, or None"""
+        row = self._db.execute('SELECT data FROM entries WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        
+        with self._db:
+            self._db.execute('UPDATE entries SET last_used = ? WHERE key = ?', (time.time(), key))
+        self.hits += 1
+        return json.loads(row[0])
+    
+    def put(self, key, strapi_data):
+        """Store a Strapi layout and evict least recently used entries over the limits"""
+        data = json.dumps(strapi_data, ensure_ascii=False, separators=(',', ':'))
+        size = len(data.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        
+        with self._db:
+            self._db.execute(
+                'INSERT OR REPLACE INTO entries (key, data, size, last_used) VALUES (?, ?, ?, ?)',
+                (key, data, size, time.time())
+            )
+            self._evict()
+    
+    def _evict(self):
+        count, total = self._db.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries').fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        
+        doomed = []
+        for key, size in self._db.execute('SELECT key, size FROM entries ORDER BY last_used'):
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            count -= 1
+            total -= size
+        self._db.executemany('DELETE FROM entries WHERE key = ?', doomed)
+    
+    def clear(self):
+        """Remove every entry"""
+        with self._db:
+            self._db.execute('DELETE FROM entries')
+        self._db.execute('VACUUM')
+    
+    def close(self):
+        self._db.close()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Conversion Metrics
+Opt-in per-phase timing and allocation profiling for conversions
+"""
+
+import contextlib
+import json
+import time
+import tracemalloc
+
+
+# Phases in pipeline order, used to order reports
+PHASE_ORDER = [
+    "cache_lookup",
+    "stream_extraction",
+    "load",
+    "extraction",
+    "table_extraction",
+    "content_extraction",
+    "layout_generation",
+    "media_extraction",
+    "serialization",
+    "write",
+]
+
+
+def profile_phase(profiler, name):
+    """Context manager timing `name` on `profiler`, or doing nothing without one"""
+    if profiler is None:
+        return contextlib.nullcontext()
+    return profiler.phase(name)
+
+
+class PhaseProfiler:
+    """Records wall time and memory allocation per phase of one conversion
+
+    Allocation is measured with tracemalloc (started on first use if it is
+    not already tracing): `alloc_bytes` is the net memory still allocated
+    when the phase ends and `peak_bytes` the highest point reached during
+    it, both relative to the start of the phase. Document statistics such
+    as paragraph count are added with `add_stat`.
+    """
+
+    def __init__(self, track_allocations=True):
+        self.track_allocations = track_allocations
+        self.phases = {}
+        self.stats = {}
+        if track_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        tracing = self.track_allocations and tracemalloc.is_tracing()
+        if tracing:
+            if hasattr(tracemalloc, 'reset_peak'):
+                tracemalloc.reset_peak()
+            start_current, _ = tracemalloc.get_traced_memory()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            entry = self.phases.setdefault(name, {"seconds": 0.0, "alloc_bytes": 0, "peak_bytes": 0})
+            entry["seconds"] += elapsed
+            if tracing:
+                current, peak = tracemalloc.get_traced_memory()
+                entry["alloc_bytes"] += current - start_current
+                entry["peak_bytes"] = max(entry["peak_bytes"], peak - start_current)
+
+    def add_stat(self, name, value):
+        self.stats[name] = self.stats.get(name, 0) + value
+
+    def summary(self):
+        """Plain dict of the recorded phases and stats (picklable, JSON-ready)"""
+        return {"phases": dict(self.phases), "stats": dict(self.stats)}
+
+
+class MetricsAggregator:
+    """Aggregates PhaseProfiler summaries across a batch"""
+
+    def __init__(self):
+        self.documents = {"ok": 0, "failed": 0}
+        self.phases = {}
+        self.stats = {}
+        self.durations = []
+
+    def add(self, summary, ok=True, duration=None):
+        """Add one document's profile summary"""
+        self.documents["ok" if ok else "failed"] += 1
+        if duration is not None:
+            self.durations.append(duration)
+        for name, entry in summary.get("phases", {}).items():
+            total = self.phases.setdefault(name, {"calls": 0, "seconds": 0.0, "alloc_bytes": 0,
+                                                  "peak_bytes": 0, "max_seconds": 0.0})
+            total["calls"] += 1
+            total["seconds"] += entry["seconds"]
+            total["alloc_bytes"] += entry["alloc_bytes"]
+            total["peak_bytes"] = max(total["peak_bytes"], entry["peak_bytes"])
+            total["max_seconds"] = max(total["max_seconds"], entry["seconds"])
+        for name, value in summary.get("stats", {}).items():
+            self.stats[name] = self.stats.get(name, 0) + value
+
+    def ordered_phases(self):
+        known = [name for name in PHASE_ORDER if name in self.phases]
+        return known + sorted(name for name in self.phases if name not in PHASE_ORDER)
+
+    def as_dict(self):
+        return {
+            "documents": dict(self.documents),
+            "seconds_total": sum(self.durations),
+            "phases": {name: dict(self.phases[name]) for name in self.ordered_phases()},
+            "stats": dict(self.stats),
+        }
+
+    def print_table(self):
+        """Print a per-phase profile table"""
+        total = sum(entry["seconds"] for entry in self.phases.values()) or 1.0
+        print("")
+        print("PROFILE:")
+        print("=" * 78)
+        print(f"{'Phase':<20}{'calls':>7}{'total s':>10}{'mean ms':>10}{'max ms':>10}"
+              f"{'share':>8}{'peak alloc':>13}")
+        for name in self.ordered_phases():
+            entry = self.phases[name]
+            mean = entry["seconds"] / entry["calls"]
+            print(f"{name:<20}{entry['calls']:>7}{entry['seconds']:>10.3f}{mean * 1000:>10.2f}"
+                  f"{entry['max_seconds'] * 1000:>10.2f}{entry['seconds'] / total:>8.1%}"
+                  f"{format_bytes(entry['peak_bytes']):>13}")
+        print("-" * 78)
+        print(f"Documents: {self.documents['ok']} ok, {self.documents['failed']} failed")
+        for name, value in sorted(self.stats.items()):
+            shown = format_bytes(value) if name.endswith('_bytes') else f"{value:,}"
+            print(f"{name.replace('_', ' ').capitalize()}: {shown}")
+
+    def to_prometheus(self, prefix='strapi_converter'):
+        """Prometheus text exposition format"""
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            for labels, value in samples:
+                label_text = ','.join(f'{key}="{val}"' for key, val in labels.items())
+                lines.append(f"{prefix}_{name}{{{label_text}}} {value}" if label_text
+                             else f"{prefix}_{name} {value}")
+
+        phases = self.ordered_phases()
+        metric("documents_total", "counter", "Documents converted, by status.",
+               [({"status": status}, count) for status, count in self.documents.items()])
+        metric("phase_seconds_total", "counter", "Wall time spent in each conversion phase.",
+               [({"phase": name}, f"{self.phases[name]['seconds']:.6f}") for name in phases])
+        metric("phase_calls_total", "counter", "Times each conversion phase ran.",
+               [({"phase": name}, self.phases[name]["calls"]) for name in phases])
+        metric("phase_net_alloc_bytes", "gauge", "Net memory allocated by each phase, summed over documents.",
+               [({"phase": name}, self.phases[name]["alloc_bytes"]) for name in phases])
+        metric("phase_peak_alloc_bytes", "gauge", "Largest allocation peak seen in each phase.",
+               [({"phase": name}, self.phases[name]["peak_bytes"]) for name in phases])
+        for name, value in sorted(self.stats.items()):
+            metric(f"{name}_total", "counter", f"Sum of {name.replace('_', ' ')} over converted documents.",
+                   [({}, value)])
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path, fmt=None):
+        """Write the metrics as JSON or Prometheus text (chosen by extension if `fmt` is None)"""
+        if fmt is None:
+            fmt = 'prometheus' if path.endswith(('.prom', '.txt')) else 'json'
+        with open(path, 'w', encoding='utf-8') as f:
+            if fmt == 'prometheus':
+                f.write(self.to_prometheus())
+            else:
+                json.dump(self.as_dict(), f, indent=2)
+
+
+def format_bytes(size):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if abs(size) < 1024 or unit == 'GB':
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024.0
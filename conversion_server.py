@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+"""
+Conversion Server
+Local HTTP service converting uploaded Word documents with a warm worker pool
+"""
+
+import argparse
+import asyncio
+import functools
+import io
+import json
+import os
+import signal
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import cli_converter
+from converter_core import ENGINES
+from json_serializer import BACKENDS, JSONSerializer
+from strapi_publisher import percentile
+
+
+DEFAULT_MAX_UPLOAD_BYTES = 20 * 1024 * 1024
+MAX_HEADER_BYTES = 64 * 1024
+HEADER_TIMEOUT = 30
+BODY_TIMEOUT = 120
+RESPONSE_CHUNK_SIZE = 64 * 1024
+
+# Latencies kept for the /metrics quantiles
+LATENCY_WINDOW = 2048
+
+# Paths counted under their own label; any other request path is counted as "other"
+ROUTES = ('/convert', '/metrics', '/healthz')
+
+STATUS_TEXT = {
+    200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+    408: 'Request Timeout', 411: 'Length Required', 413: 'Payload Too Large',
+    422: 'Unprocessable Entity', 503: 'Service Unavailable',
+}
+
+
+class HTTPError(Exception):
+    """Ends a request with an error status and a JSON {"error": ...} body"""
+
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+# Worker side: each worker builds one converter in cli_converter._init_worker
+# and keeps it for its whole life.
+
+def _init_server_worker(**kwargs):
+    # Ctrl+C reaches the whole process group; only the server handles it
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    cli_converter._init_worker(**kwargs)
+
+
+def _warm_worker(engine):
+    """Import the reader libraries now rather than on the first request"""
+    if engine == 'stream':
+        import docx_stream_reader  # noqa: F401
+    else:
+        import docx  # noqa: F401
+    return os.getpid()
+
+
+def _convert_upload(data):
+    """Convert one uploaded .docx (bytes) to serialized JSON bytes; runs in a worker"""
+    converter = cli_converter._worker_converter
+    strapi_data = converter.convert_to_strapi(io.BytesIO(data))
+    return converter.serialize(strapi_data)
+
+
+def extract_upload(content_type, body):
+    """The .docx bytes of a request: the raw body, or the file part of a multipart form"""
+    if not content_type.lower().startswith('multipart/form-data'):
+        return body
+
+    from email.parser import BytesParser
+    from email.policy import HTTP
+    message = BytesParser(policy=HTTP).parsebytes(
+        b'Content-Type: ' + content_type.encode('latin-1') + b'\r\n\r\n' + body)
+    if not message.is_multipart():
+        raise HTTPError(400, "Malformed multipart body")
+    for part in message.iter_parts():
+        if part.get_filename() or part.get_param('name', header='content-disposition') == 'file':
+            return part.get_payload(decode=True) or b''
+    raise HTTPError(400, "Multipart body has no file part")
+
+
+def label_value(value):
+    """Escape a Prometheus label value (backslash, double quote and newline)"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class ServerMetrics:
+    """Request counters and latencies for /metrics
+
+    Requests are counted by route, not by the raw request path, so clients
+    cannot create new label series.
+    """
+
+    def __init__(self):
+        self.requests = {}
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.latency_sum = 0.0
+        self.latency_count = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.in_flight = 0
+        self.queued = 0
+        self.pool_restarts = 0
+
+    def record(self, path, status, seconds):
+        key = (path if path in ROUTES else 'other', status)
+        self.requests[key] = self.requests.get(key, 0) + 1
+        if path == '/convert':
+            self.latencies.append(seconds)
+            self.latency_sum += seconds
+            self.latency_count += 1
+
+    def to_prometheus(self, prefix='strapi_converter_server'):
+        """Prometheus text exposition format"""
+        lines = [
+            f"# HELP {prefix}_requests_total HTTP requests, by path and status.",
+            f"# TYPE {prefix}_requests_total counter",
+        ]
+        for (path, status), count in sorted(self.requests.items()):
+            lines.append(f'{prefix}_requests_total{{path="{label_value(path)}",status="{status}"}} {count}')
+
+        latencies = list(self.latencies)
+        lines += [
+            f"# HELP {prefix}_convert_seconds Latency of /convert requests "
+            f"(quantiles over the last {LATENCY_WINDOW}).",
+            f"# TYPE {prefix}_convert_seconds summary",
+        ]
+        for quantile in (50, 90, 99):
+            lines.append(f'{prefix}_convert_seconds{{quantile="{quantile / 100}"}} '
+                         f'{percentile(latencies, quantile):.6f}')
+        lines.append(f"{prefix}_convert_seconds_sum {self.latency_sum:.6f}")
+        lines.append(f"{prefix}_convert_seconds_count {self.latency_count}")
+
+        for name, kind, help_text, value in (
+                ("upload_bytes_total", "counter", "Bytes of .docx uploads received.", self.bytes_in),
+                ("response_bytes_total", "counter", "Bytes of JSON sent back.", self.bytes_out),
+                ("conversions_in_flight", "gauge", "Conversions running in the worker pool.", self.in_flight),
+                ("conversions_queued", "gauge", "Requests waiting for a worker.", self.queued),
+                ("pool_restarts_total", "counter", "Worker pools replaced after a worker died.",
+                 self.pool_restarts)):
+            lines += [f"# HELP {prefix}_{name} {help_text}", f"# TYPE {prefix}_{name} {kind}",
+                      f"{prefix}_{name} {value}"]
+        return '\n'.join(lines) + '\n'
+
+
+class ConversionServer:
+    """asyncio HTTP server in front of a pre-warmed process pool
+
+    POST /convert takes a .docx as the raw request body or as the file part
+    of a multipart form and answers with the Strapi layout as JSON. Uploads
+    over `max_upload_bytes` are refused before they are read. At most
+    `max_in_flight` conversions run at once (one per worker by default) and
+    at most `max_queue` more may wait; beyond that requests get 503 with
+    Retry-After. GET /metrics serves Prometheus metrics and GET /healthz a
+    liveness check. If a worker dies the conversion that notices replaces
+    the pool with a fresh one and the requests it was running get 503;
+    /healthz answers 503 until a worker of the new pool is up.
+    """
+
+    def __init__(self, host='127.0.0.1', port=8080, jobs=None, engine='python-docx', mapping_file=None,
+                 serializer=None, max_upload_bytes=DEFAULT_MAX_UPLOAD_BYTES, max_in_flight=None,
+                 max_queue=64):
+        self.host = host
+        self.port = port
+        self.jobs = jobs or os.cpu_count() or 1
+        self.engine = engine
+        self.mapping_file = mapping_file
+        self.serializer = serializer or JSONSerializer()
+        self.max_upload_bytes = max_upload_bytes
+        self.max_in_flight = max_in_flight or self.jobs
+        self.max_queue = max_queue
+        self.metrics = ServerMetrics()
+        self.pool = None
+        # Set when a conversion finds the pool broken, cleared once its
+        # replacement has started a worker
+        self.pool_broken = False
+        self._recovery = None
+        self._slots = None
+
+    def new_pool(self):
+        """A process pool whose workers each build one converter"""
+        initializer = functools.partial(_init_server_worker, engine=self.engine, mapping_file=self.mapping_file,
+                                        cache_dir=False, serializer=self.serializer)
+        return ProcessPoolExecutor(max_workers=self.jobs, initializer=initializer)
+
+    def start_pool(self):
+        """Start the workers and wait until each has built its converter and imported its reader"""
+        self.pool = self.new_pool()
+        # Pool workers start on demand, so keep enough warm-up calls running
+        # at once that every worker gets one
+        futures = [self.pool.submit(_warm_worker, self.engine) for _ in range(self.jobs * 2)]
+        return len({future.result() for future in futures})
+
+    def replace_pool(self, broken):
+        """Swap a broken pool for a new one (once, however many requests saw it break)"""
+        if self.pool is not broken:
+            return
+        self.pool_broken = True
+        self.pool = self.new_pool()
+        self.metrics.pool_restarts += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+        print("A worker process died; started a new worker pool")
+        self._recovery = asyncio.get_running_loop().create_task(self.await_pool(self.pool))
+
+    async def await_pool(self, pool):
+        """Clear the broken flag once `pool` has started a worker"""
+        try:
+            await asyncio.get_running_loop().run_in_executor(pool, _warm_worker, self.engine)
+        except BrokenProcessPool:
+            # The next conversion finds it broken and replaces it again
+            return
+        if self.pool is pool:
+            self.pool_broken = False
+
+    def healthy(self):
+        """False from a worker dying until the replacement pool is up"""
+        return not self.pool_broken
+
+    async def serve(self):
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+        server = await asyncio.start_server(self.handle_connection, self.host, self.port,
+                                            limit=MAX_HEADER_BYTES)
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop.set)
+            except (NotImplementedError, RuntimeError):
+                pass
+        async with server:
+            print(f"Serving on http://{self.host}:{self.port} "
+                  f"({self.jobs} workers, engine {self.engine}; Ctrl+C to stop)")
+            await stop.wait()
+        print("Shutting down")
+
+    async def handle_connection(self, reader, writer):
+        """Serve requests on one keep-alive connection"""
+        try:
+            while True:
+                keep_alive = await self.handle_request(reader, writer)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def handle_request(self, reader, writer):
+        """Read and answer one request; returns whether to keep the connection open"""
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), HEADER_TIMEOUT)
+        except asyncio.IncompleteReadError as e:
+            if e.partial:
+                await self.send_error(writer, HTTPError(400, "Incomplete request"), '-', time.perf_counter())
+            return False
+        except asyncio.LimitOverrunError:
+            await self.send_error(writer, HTTPError(400, "Request headers too large"), '-', time.perf_counter())
+            return False
+        except asyncio.TimeoutError:
+            return False
+
+        start = time.perf_counter()
+        try:
+            request_line, *header_lines = head.decode('latin-1').split('\r\n')
+            method, target, version = request_line.split(' ', 2)
+        except ValueError:
+            await self.send_error(writer, HTTPError(400, "Malformed request line"), '-', start)
+            return False
+        headers = {}
+        for line in header_lines:
+            if ':' in line:
+                name, value = line.split(':', 1)
+                headers[name.strip().lower()] = value.strip()
+        path = target.split('?', 1)[0]
+        keep_alive = (headers.get('connection', '').lower() != 'close'
+                      and version.upper() == 'HTTP/1.1')
+
+        try:
+            if path == '/convert':
+                if method != 'POST':
+                    raise HTTPError(405, "Use POST", {'Allow': 'POST'})
+                body = await self.read_body(reader, headers)
+                data = extract_upload(headers.get('content-type', ''), body)
+                result = await self.convert(data)
+                await self.send(writer, 200, result, 'application/json', keep_alive=keep_alive)
+                self.metrics.bytes_out += len(result)
+            elif path == '/metrics' and method == 'GET':
+                await self.send(writer, 200, self.metrics.to_prometheus().encode('utf-8'),
+                                'text/plain; version=0.0.4', keep_alive=keep_alive)
+            elif path == '/healthz' and method == 'GET':
+                if not self.healthy():
+                    raise HTTPError(503, "Worker pool was broken and is being replaced")
+                await self.send(writer, 200, b'{"status":"ok"}', 'application/json', keep_alive=keep_alive)
+            else:
+                raise HTTPError(404, f"No route for {method} {path}")
+        except HTTPError as e:
+            # A body that was refused unread leaves the connection unusable
+            keep_alive = keep_alive and e.status not in (400, 408, 411, 413)
+            await self.send_error(writer, e, path, start, keep_alive)
+            return keep_alive
+
+        self.metrics.record(path, 200, time.perf_counter() - start)
+        return keep_alive
+
+    async def read_body(self, reader, headers):
+        """Read the request body, enforcing the upload size limit"""
+        if 'chunked' in headers.get('transfer-encoding', '').lower():
+            raise HTTPError(411, "Chunked uploads are not supported; send Content-Length")
+        try:
+            length = int(headers['content-length'])
+        except (KeyError, ValueError):
+            raise HTTPError(411, "Content-Length required")
+        if length > self.max_upload_bytes:
+            raise HTTPError(413, f"Upload of {length} bytes exceeds the {self.max_upload_bytes} byte limit")
+        if length == 0:
+            raise HTTPError(400, "Empty upload")
+        try:
+            body = await asyncio.wait_for(reader.readexactly(length), BODY_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise HTTPError(408, "Timed out reading the upload")
+        self.metrics.bytes_in += length
+        return body
+
+    async def convert(self, data):
+        """Run one conversion in the pool, respecting the concurrency caps"""
+        if self._slots.locked() and self.metrics.queued >= self.max_queue:
+            raise HTTPError(503, "Too many conversions queued", {'Retry-After': '1'})
+
+        self.metrics.queued += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.metrics.queued -= 1
+        self.metrics.in_flight += 1
+        pool = self.pool
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(pool, _convert_upload, data)
+        except BrokenProcessPool:
+            self.replace_pool(pool)
+            raise HTTPError(503, "A worker process died; retry the upload", {'Retry-After': '1'})
+        except Exception as e:
+            raise HTTPError(422, f"Conversion failed: {type(e).__name__}: {e}")
+        finally:
+            self.metrics.in_flight -= 1
+            self._slots.release()
+
+    async def send(self, writer, status, body, content_type, headers=None, keep_alive=True):
+        """Write a response, streaming the body in chunks"""
+        lines = [f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}",
+                 f"Content-Type: {content_type}",
+                 f"Content-Length: {len(body)}",
+                 f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+        view = memoryview(body)
+        for offset in range(0, len(body), RESPONSE_CHUNK_SIZE):
+            writer.write(view[offset:offset + RESPONSE_CHUNK_SIZE])
+            await writer.drain()
+        await writer.drain()
+
+    async def send_error(self, writer, error, path, start, keep_alive=False):
+        body = json.dumps({"error": str(error)}).encode('utf-8')
+        try:
+            await self.send(writer, error.status, body, 'application/json', error.headers, keep_alive)
+        finally:
+            self.metrics.record(path, error.status, time.perf_counter() - start)
+
+    def run(self):
+        """Warm the pool, then serve until interrupted"""
+        start = time.perf_counter()
+        workers = self.start_pool()
+        print(f"Warmed {workers} workers in {time.perf_counter() - start:.2f}s")
+        try:
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.pool.shutdown(cancel_futures=True)
+
+
+def main(argv=None):
+    """Main function"""
+    parser = argparse.ArgumentParser(prog='cli_converter.py serve',
+                                     description='Serve Word to Strapi conversions over HTTP')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8080, help='Port to listen on (default: 8080)')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='Worker processes (default: CPU count)')
+    parser.add_argument('--max-in-flight', type=int, default=None,
+                        help='Conversions running at once (default: one per worker)')
+    parser.add_argument('--max-queue', type=int, default=64,
+                        help='Requests allowed to wait for a worker before answering 503 (default: 64)')
+    parser.add_argument('--max-upload-mb', type=float, default=DEFAULT_MAX_UPLOAD_BYTES / (1024 * 1024),
+                        help='Largest accepted upload in MB (default: 20)')
+    parser.add_argument('--engine', choices=ENGINES, default='python-docx',
+                        help='Document reader (default: python-docx)')
+    parser.add_argument('--mapping', help='json5 template mapping file (default: template_mapping.json5)')
+    parser.add_argument('--json-backend', choices=BACKENDS, default='auto',
+                        help='JSON encoder (default: auto)')
+    parser.add_argument('--compact', action='store_true', help='Answer with compact JSON')
+
+    args = parser.parse_args(argv)
+    if args.jobs is not None and args.jobs < 1:
+        parser.error('--jobs must be at least 1')
+
+    try:
+        serializer = JSONSerializer(args.json_backend, args.compact)
+        # Fail on a bad mapping here rather than in every worker
+        cli_converter.CLIWordToStrapiConverter(args.engine, args.mapping, serializer=serializer)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    server = ConversionServer(args.host, args.port, args.jobs, args.engine, args.mapping, serializer,
+                              max_upload_bytes=int(args.max_upload_mb * 1024 * 1024),
+                              max_in_flight=args.max_in_flight, max_queue=args.max_queue)
+    server.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+"""
+Word to Strapi Conversion Core
+Headless extraction and layout generation used by both the GUI and the CLI
+"""
+
+import os
+from datetime import datetime
+
+from conversion_metrics import profile_phase
+from field_mapping import load_mapping
+from json_serializer import JSONSerializer
+
+
+# Bump when a change alters the produced output, to invalidate cached conversions
+CONVERTER_VERSION = '1.3'
+
+ENGINES = ('python-docx', 'stream')
+
+CONTENT_FORMATS = ('text', 'markdown', 'blocks')
+
+# Stamped on every layout when it is generated, so never cached
+TIMESTAMP_KEYS = ('publishedAt', 'createdAt', 'updatedAt')
+
+
+class ContentCollector:
+    """Collects the content draft paragraphs that follow the "Content Draft" heading"""
+    
+    SKIPPED_TEXT = [
+        'blog template document',
+        'this document follows the blog template format with a table containing metadata fields followed by the content draft.'
+    ]
+    
+    def __init__(self):
+        self.content = []
+        self.content_section_found = False
+    
+    def feed(self, text):
+        """Consider one paragraph of text"""
+        if self.accepts(text):
+            self.content.append(text.strip())
+    
+    def accepts(self, text):
+        """True if a paragraph with this text belongs to the content draft"""
+        text = text.strip()
+        
+        # Skip empty paragraphs
+        if not text:
+            return False
+        
+        # Look for the "Content Draft" section
+        if text.lower() == 'content draft':
+            self.content_section_found = True
+            return False
+        
+        # Skip other headers and titles
+        if text.lower() in self.SKIPPED_TEXT:
+            return False
+        
+        # If we've found the content section, start collecting content
+        return self.content_section_found
+    
+    def text(self):
+        return '\n\n'.join(self.content)
+
+
+class ConversionCore:
+    """Headless Word to Strapi conversion shared by the GUI and the CLI
+
+    Importing this module is cheap and never touches tkinter: python-docx
+    (and lxml behind it) is imported when the first document is loaded, the
+    streaming reader when the first document is streamed, and json5 when
+    the first mapping file is read.
+    
+    `content_format` selects how the content draft is emitted: plain text
+    (paragraphs separated by blank lines), Markdown, or a list of Strapi
+    rich-text blocks. The formatted renderings need the python-docx engine.
+    """
+    
+    def __init__(self, engine='python-docx', mapping_file=None, cache=None, serializer=None,
+                 content_format='text'):
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown reader engine '{engine}' (expected one of: {', '.join(ENGINES)})")
+        if content_format not in CONTENT_FORMATS:
+            raise ValueError(f"Unknown content format '{content_format}' "
+                             f"(expected one of: {', '.join(CONTENT_FORMATS)})")
+        if content_format != 'text' and engine == 'stream':
+            raise ValueError(f"The {content_format} content format needs the python-docx engine")
+        self.engine = engine
+        self.content_format = content_format
+        
+        # Optional ConversionCache consulted before opening a document
+        self.cache = cache
+        
+        # Optional PhaseProfiler recording per-phase time and allocation
+        self.profiler = None
+        
+        # Encodes saved layouts (indented JSON, orjson when installed, by default)
+        self.serializer = serializer or JSONSerializer()
+        
+        # Fixed ISO timestamp stamped on every layout (e.g. one per batch);
+        # None captures a fresh one per document
+        self.timestamp = None
+        
+        # Optional MediaStore receiving the document's embedded images; their
+        # references are added to the layout under "media"
+        self.media = None
+        
+        # Optional RecordManifest of the last record emitted per document,
+        # used to diff reconversions (see emit_strapi_file)
+        self.manifest = None
+        
+        # True when emitted records are also published: they are remembered
+        # as pending, and a pending record is emitted again in full until the
+        # caller marks it published
+        self.publishing = False
+        
+        # Template fields, compiled from the mapping config
+        self.mapping = load_mapping(mapping_file)
+        self.template_fields = self.mapping.labels
+    
+    def load_document(self, input_file):
+        """Open a Word document with python-docx (imported on first use)"""
+        from docx import Document
+        return Document(input_file)
+    
+    def match_table_row(self, cells, table_data):
+        """Record the template field held by one table row, if any; True if it held one"""
+        if len(cells) >= 2:
+            # Check if this field is in our template
+            template_field = self.mapping.match(cells[0])
+            if template_field is not None:
+                table_data[template_field] = cells[1].strip()
+                return True
+        return False
+    
+    def table_rows(self, table):
+        """Cell texts of each row of a w:tbl element, as `_Row.cells` gives them
+        
+        A merged cell is repeated for every grid column it spans and every
+        row it continues into, but its text is built only once.
+        """
+        from docx.text.paragraph import Paragraph
+        
+        above = {}
+        for tr in table.tr_lst:
+            cells = []
+            row = {}
+            for tc in tr.tc_lst:
+                offset = len(cells)
+                if tc.vMerge == 'continue':
+                    text = above.get(offset, '')
+                else:
+                    text = '\n'.join(Paragraph(p, None).text for p in tc.p_lst)
+                row[offset] = text
+                cells.extend([text] * tc.grid_span)
+            above = row
+            yield cells
+    
+    def extract_document(self, doc, table=True, content=True):
+        """Extract table data and the content draft in one in-order walk of the body
+        
+        Returns (table_data, content). The template table is the first table
+        with a row naming a template field, and rows are matched only until
+        it ends, so tables later in the draft never overwrite the metadata.
+        Paragraphs are handed to the content collector (or renderer) as they
+        are reached. Pass `table` or `content` False to skip that half (its
+        value is then None); a table-only walk stops after the template
+        table. Content is '' when the document has no table at all.
+        """
+        from docx.text.paragraph import Paragraph
+        from docx_stream_reader import P, TBL
+        
+        table_data = {} if table else None
+        collector = ContentCollector()
+        renderer = None
+        if content and self.content_format != 'text':
+            from content_renderer import ContentRenderer
+            renderer = ContentRenderer(self.content_format, doc, collector)
+        
+        in_template = template_done = not table
+        table_found = False
+        paragraphs = 0
+        rows = 0
+        
+        for block in doc.element.body.iterchildren(P, TBL):
+            # Any block after the template table ends it
+            template_done = template_done or in_template
+            if template_done and not content:
+                break
+            
+            if block.tag == TBL:
+                table_found = True
+                rows += len(block.tr_lst)
+                if not template_done:
+                    for cells in self.table_rows(block):
+                        if self.match_table_row([text.strip() for text in cells], table_data):
+                            in_template = True
+            else:
+                paragraphs += 1
+                if renderer is not None:
+                    renderer.feed(block)
+                elif content:
+                    collector.feed(Paragraph(block, doc).text)
+        
+        if not content:
+            return table_data, None
+        
+        if self.profiler is not None:
+            self.profiler.add_stat("paragraphs", paragraphs)
+            self.profiler.add_stat("table_rows", rows)
+        
+        # Without any table the template is missing and there is no content
+        if not table_found:
+            return table_data, ''
+        return table_data, renderer.result() if renderer is not None else collector.text()
+    
+    def extract_table_data(self, doc):
+        """Extract data from the template table at the beginning of the document"""
+        return self.extract_document(doc, content=False)[0]
+    
+    def extract_content(self, doc):
+        """Extract the content draft that follows the table"""
+        return self.extract_document(doc, table=False)[1]
+    
+    def extract_streaming(self, input_file):
+        """Extract table data and content in one pass with the streaming reader
+        
+        The template table is recognized as in extract_document.
+        """
+        from docx_stream_reader import iter_body_blocks
+        
+        table_data = {}
+        collector = ContentCollector()
+        table_found = False
+        in_template = template_done = False
+        
+        paragraphs = 0
+        rows = 0
+        
+        for kind, value in iter_body_blocks(input_file):
+            if kind == 'row':
+                rows += 1
+                if not template_done and self.match_table_row([text.strip() for text in value], table_data):
+                    in_template = True
+                continue
+            
+            # Any block after the template table ends it
+            template_done = template_done or in_template
+            if kind == 'paragraph':
+                paragraphs += 1
+                collector.feed(value)
+            else:
+                table_found = True
+        
+        if self.profiler is not None:
+            self.profiler.add_stat("paragraphs", paragraphs)
+            self.profiler.add_stat("table_rows", rows)
+        
+        return table_data, collector.text() if table_found else ''
+    
+    def read_template_table(self, input_file):
+        """Table data from the template table only, or None if there is no table
+
+        Uses the streaming reader and stops where the template table (see
+        extract_document) ends, so the content draft is never parsed.
+        """
+        from docx_stream_reader import iter_body_blocks
+        
+        table_data = {}
+        table_found = in_template = False
+        blocks = iter_body_blocks(input_file)
+        try:
+            for kind, value in blocks:
+                if kind == 'row':
+                    if self.match_table_row([text.strip() for text in value], table_data):
+                        in_template = True
+                elif in_template:
+                    break
+                elif kind == 'table':
+                    table_found = True
+        finally:
+            blocks.close()
+        
+        return table_data if table_found else None
+    
+    def validate_document(self, input_file):
+        """Problems with a document's template table under the mapping's rules, as messages"""
+        table_data = self.read_template_table(input_file)
+        if table_data is None:
+            return ["No template table"]
+        return self.mapping.validate(table_data)
+    
+    def generate_strapi_layout(self, table_data, content):
+        """Generate Strapi layout JSON"""
+        attributes = self.mapping.strapi_attributes(table_data)
+        attributes["content"] = content
+        
+        return self.stamp_timestamps({"data": attributes})
+    
+    def stamp_timestamps(self, strapi_data):
+        """Set publishedAt, createdAt and updatedAt to the converter's timestamp (or now)"""
+        timestamp = self.timestamp or datetime.now().isoformat()
+        strapi_data["data"].update(dict.fromkeys(TIMESTAMP_KEYS, timestamp))
+        return strapi_data
+    
+    def convert_to_strapi(self, input_file, verbose=False):
+        """Load a Word document and build its Strapi layout"""
+        profiler = self.profiler
+        cache_key = None
+        if self.cache is not None:
+            with profile_phase(profiler, "cache_lookup"):
+                # The engines agree on text, but a hit must never serve the other engine's output
+                salt = f"{CONVERTER_VERSION}:{self.engine}:{self.mapping.fingerprint}"
+                if self.content_format != 'text':
+                    salt += f":{self.content_format}"
+                cache_key = self.cache.key_for(input_file, salt)
+                strapi_data = self.cache.get(cache_key)
+            if strapi_data is not None:
+                if verbose:
+                    print("Document unchanged, using cached conversion")
+                return self.attach_media(self.stamp_timestamps(strapi_data), input_file)
+        
+        if self.engine == 'stream':
+            with profile_phase(profiler, "stream_extraction"):
+                table_data, content = self.extract_streaming(input_file)
+        else:
+            # Load the Word document
+            with profile_phase(profiler, "load"):
+                doc = self.load_document(input_file)
+            
+            # Extract table data and content in one walk of the body
+            with profile_phase(profiler, "extraction"):
+                table_data, content = self.extract_document(doc)
+        
+        if verbose:
+            print(f"Extracted {len(table_data)} fields from table")
+            for field, value in table_data.items():
+                print(f"  {field}: {value}")
+            if isinstance(content, list):
+                print(f"Extracted content: {len(content)} blocks")
+            else:
+                print(f"Extracted content length: {len(content)} characters")
+                print(f"Content preview: {content[:100]}...")
+        
+        # Generate Strapi layout
+        with profile_phase(profiler, "layout_generation"):
+            strapi_data = self.generate_strapi_layout(table_data, content)
+        
+        if cache_key is not None:
+            # Timestamps belong to this conversion; a cache hit gets fresh ones
+            attributes = {name: value for name, value in strapi_data["data"].items()
+                          if name not in TIMESTAMP_KEYS}
+            self.cache.put(cache_key, {"data": attributes})
+        
+        return self.attach_media(strapi_data, input_file)
+    
+    def attach_media(self, strapi_data, input_file):
+        """Extract the document's images into the media store and reference them"""
+        if self.media is None:
+            return strapi_data
+        
+        with profile_phase(self.profiler, "media_extraction"):
+            references = self.media.extract(input_file)
+        
+        if self.profiler is not None:
+            self.profiler.add_stat("media_files", len(references))
+            self.profiler.add_stat("media_bytes", sum(ref["size"] for ref in references))
+        
+        strapi_data["data"]["media"] = references
+        return strapi_data
+    
+    def serialize(self, strapi_data):
+        """Strapi layout as UTF-8 JSON bytes"""
+        return self.serializer.dumps(strapi_data)
+    
+    def save_strapi_file(self, strapi_data, output_file):
+        """Save the Strapi layout to a JSON file"""
+        with profile_phase(self.profiler, "serialization"):
+            data = self.serialize(strapi_data)
+        
+        with profile_phase(self.profiler, "write"):
+            with open(output_file, 'wb') as f:
+                f.write(data)
+        
+        if self.profiler is not None:
+            self.profiler.add_stat("output_bytes", len(data))
+    
+    def reconcile(self, input_file, strapi_data):
+        """Diff a fresh layout against the document's last emitted record
+
+        Returns (record, changes, previous). Without a manifest the layout is
+        returned as is and `changes` is None; otherwise see merge_record.
+        When publishing, a record whose last publish did not succeed counts
+        as new: every attribute is a change and there is no previous record.
+        """
+        if self.manifest is None:
+            return strapi_data, None, None
+        from record_manifest import TIMESTAMP_KEYS, merge_record
+        previous, pending = self.manifest.lookup(input_file)
+        record, changes = merge_record(previous, strapi_data)
+        if pending and self.publishing:
+            return record, [name for name in record["data"] if name not in TIMESTAMP_KEYS], None
+        return record, changes, previous
+    
+    def remember(self, input_file, record):
+        """Store an emitted record in the manifest (as pending when publishing)"""
+        self.manifest.put(input_file, record, pending=self.publishing)
+    
+    def emit_strapi_file(self, input_file, strapi_data, output_file):
+        """Save a layout unless the manifest shows it is unchanged
+
+        Returns (record, changes, previous) from reconcile. An unchanged
+        document is not written again unless its output file is missing.
+        """
+        record, changes, previous = self.reconcile(input_file, strapi_data)
+        if changes == [] and os.path.exists(output_file):
+            return record, changes, previous
+        
+        self.save_strapi_file(record, output_file)
+        if self.manifest is not None and changes:
+            self.remember(input_file, record)
+        return record, changes, previous
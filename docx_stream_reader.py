@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Streaming Word Document Reader
+Reads the body of a .docx in a single forward pass without python-docx
+"""
+
+import posixpath
+import zipfile
+import xml.etree.ElementTree as ET
+
+
+W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+REL = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+OFFICE_DOCUMENT = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument'
+
+BODY = W + 'body'
+TBL = W + 'tbl'
+TR = W + 'tr'
+TC = W + 'tc'
+TC_PR = W + 'tcPr'
+P = W + 'p'
+R = W + 'r'
+HYPERLINK = W + 'hyperlink'
+
+# Run inner-content translated to text, matching python-docx's Run.text (1.0 and later)
+RUN_TEXT = {
+    W + 'tab': '\t',
+    W + 'ptab': '\t',
+    W + 'cr': '\n',
+    W + 'noBreakHyphen': '-',
+}
+
+
+def main_document_part(zf):
+    """Name of the main document part, resolved through the package relationships"""
+    try:
+        with zf.open('_rels/.rels') as f:
+            for rel in ET.parse(f).getroot().iter(REL + 'Relationship'):
+                if rel.get('Type') == OFFICE_DOCUMENT:
+                    return posixpath.normpath(rel.get('Target').lstrip('/'))
+    except KeyError:
+        pass
+    return 'word/document.xml'
+
+
+def iter_body_blocks(source):
+    """Yield the top-level blocks of a .docx body in document order
+
+    `source` is a path or a binary file-like object. Events are:
+
+    - ("table", None) when a top-level table starts
+    - ("row", [cell texts]) for each row of a top-level table
+    - ("paragraph", text) for each top-level body paragraph
+
+    Text is built the way python-docx 1.0+ builds `Paragraph.text` and `Cell.text`
+    (runs and hyperlinks only; tabs and line breaks translated, page and
+    column breaks dropped), and row cells
+    repeat horizontally merged cells and resolve vertically merged ones, like
+    `_Row.cells`. Nested tables are skipped, as they are by `doc.tables`.
+    """
+    with zipfile.ZipFile(source) as zf:
+        with zf.open(main_document_part(zf)) as xml_file:
+            yield from _iter_blocks(xml_file)
+
+
+def _iter_blocks(xml_file):
+    """Event-parse document.xml and yield body blocks (see iter_body_blocks)"""
+    stack = []          # open elements, outermost first
+    para_text = None    # text pieces of the paragraph being read
+    cell_paras = None   # paragraph texts of the cell being read
+    cell_span = 1
+    cell_continue = False
+    row_cells = None    # [(grid offset, span, text or None for vMerge continue)]
+    grid_above = {}     # grid offset -> cell text in the previous row
+
+    for event, elem in ET.iterparse(xml_file, events=('start', 'end')):
+        tag = elem.tag
+
+        if event == 'start':
+            depth = len(stack)
+            parent = stack[-1].tag if stack else None
+            stack.append(elem)
+
+            if tag == P and _is_block_paragraph(stack):
+                para_text = []
+            elif tag == TBL and parent == BODY:
+                grid_above = {}
+                yield ('table', None)
+            elif tag == TR and depth >= 2 and _is_top_table(stack[:-1]):
+                row_cells = []
+            elif tag == TC and row_cells is not None and stack[-2].tag == TR and _is_top_table(stack[:-2]):
+                cell_paras = []
+                cell_span = 1
+                cell_continue = False
+            continue
+
+        stack.pop()
+        parent = stack[-1] if stack else None
+
+        if para_text is not None and parent is not None:
+            # Run content belongs to the paragraph when the run is a direct
+            # child of the paragraph or of a hyperlink inside it
+            if parent.tag == R and _run_in_paragraph(stack):
+                if tag == W + 't':
+                    para_text.append(elem.text or '')
+                elif tag == W + 'br':
+                    if elem.get(W + 'type', 'textWrapping') == 'textWrapping':
+                        para_text.append('\n')
+                elif tag in RUN_TEXT:
+                    para_text.append(RUN_TEXT[tag])
+
+        if (cell_paras is not None and parent is not None and parent.tag == TC_PR
+                and len(stack) >= 5 and stack[-2].tag == TC and _is_top_table(stack[:-3])):
+            if tag == W + 'gridSpan':
+                cell_span = int(elem.get(W + 'val', '1'))
+            elif tag == W + 'vMerge':
+                cell_continue = elem.get(W + 'val', 'continue') == 'continue'
+
+        if tag == P and para_text is not None and _is_block_paragraph(stack + [elem]):
+            text = ''.join(para_text)
+            para_text = None
+            if parent.tag == BODY:
+                yield ('paragraph', text)
+            elif cell_paras is not None:
+                cell_paras.append(text)
+
+        elif tag == TC and cell_paras is not None and parent.tag == TR and _is_top_table(stack[:-1]):
+            offset = sum(span for _, span, _ in row_cells)
+            text = None if cell_continue else '\n'.join(cell_paras)
+            row_cells.append((offset, cell_span, text))
+            cell_paras = None
+
+        elif tag == TR and row_cells is not None and _is_top_table(stack):
+            cells = []
+            grid_row = {}
+            for offset, span, text in row_cells:
+                if text is None:
+                    text = grid_above.get(offset, '')
+                grid_row[offset] = text
+                cells.extend([text] * span)
+            grid_above = grid_row
+            row_cells = None
+            yield ('row', cells)
+
+        # Drop finished top-level blocks so memory stays flat on long documents
+        if parent is not None and parent.tag == BODY:
+            parent.remove(elem)
+
+
+def _is_top_table(stack):
+    """True if the innermost open element is a table directly inside the body"""
+    return len(stack) >= 2 and stack[-1].tag == TBL and stack[-2].tag == BODY
+
+
+def _is_block_paragraph(stack):
+    """True if the innermost open element is a body paragraph or a top-level table cell paragraph"""
+    if len(stack) < 2 or stack[-1].tag != P:
+        return False
+    if stack[-2].tag == BODY:
+        return True
+    return (stack[-2].tag == TC and len(stack) >= 4
+            and stack[-3].tag == TR and _is_top_table(stack[:-3]))
+
+
+def _run_in_paragraph(stack):
+    """True if the innermost open run belongs directly to the paragraph being read"""
+    if len(stack) >= 2 and stack[-2].tag == P:
+        return _is_block_paragraph(stack[:-1])
+    if len(stack) >= 3 and stack[-2].tag == HYPERLINK and stack[-3].tag == P:
+        return _is_block_paragraph(stack[:-2])
+    return False
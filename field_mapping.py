@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Template Field Mapping
+Loads template label -> Strapi attribute mappings from a json5 file and
+compiles them into a single matcher
+"""
+
+import hashlib
+import json
+import os
+import re
+from functools import lru_cache
+
+
+# Attributes the converter fills in itself
+RESERVED_KEYS = ('content', 'publishedAt', 'createdAt', 'updatedAt', 'media')
+
+# Per-field validation constraints a mapping entry may declare
+RULE_KEYS = ('required', 'minLength', 'maxLength')
+
+DEFAULT_MAPPING_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'template_mapping.json5')
+
+
+def normalize_label(label):
+    """Lowercase, collapse whitespace and drop a trailing colon"""
+    return ' '.join(label.lower().split()).rstrip(':').rstrip()
+
+
+class FieldMapping:
+    """Compiled template field mapping
+
+    `fields` is a list of (label, key) pairs in output order. Row labels are
+    resolved with one dict lookup on the normalized label; labels that only
+    contain a known label or alias (e.g. "Working Title (max 60 chars)") fall
+    back to a single regex search over all of them, longest first.
+    
+    `rules` holds each label's validation constraints (required, minLength,
+    maxLength). They only affect `validate`, not the converted output, so
+    they are left out of the fingerprint.
+    """
+    
+    def __init__(self, fields, aliases=None, path=None, rules=None):
+        self.fields = list(fields)
+        self.path = path
+        self.rules = rules or {}
+        self.labels = [label for label, _ in self.fields]
+        self.keys = {label: key for label, key in self.fields}
+        
+        # Identifies the mapping's behaviour, e.g. for cache keys
+        spec = json.dumps([self.fields, aliases or {}], sort_keys=True)
+        self.fingerprint = hashlib.sha256(spec.encode('utf-8')).hexdigest()
+        
+        self._index = {}
+        for label in self.labels:
+            self._add(label, label)
+        for label, names in (aliases or {}).items():
+            for name in names:
+                self._add(name, label)
+        
+        patterns = sorted(self._index, key=len, reverse=True)
+        self._pattern = re.compile('|'.join(re.escape(p) for p in patterns)) if patterns else None
+    
+    def _add(self, name, label):
+        normalized = normalize_label(name)
+        existing = self._index.get(normalized)
+        if existing is not None and existing != label:
+            raise ValueError(f"Label '{name}' is mapped to both '{existing}' and '{label}'")
+        self._index[normalized] = label
+    
+    def match(self, field_name):
+        """Return the template label for a table row label, or None"""
+        normalized = normalize_label(field_name)
+        label = self._index.get(normalized)
+        if label is None and self._pattern is not None:
+            found = self._pattern.search(normalized)
+            if found:
+                label = self._index[found.group(0)]
+        return label
+    
+    def validate(self, table_data):
+        """Problems with extracted table data under the mapping's rules, as messages"""
+        problems = []
+        for label, rule in self.rules.items():
+            value = table_data.get(label, '')
+            if not value:
+                if rule.get('required'):
+                    problems.append(f"{label} is missing" if label not in table_data else f"{label} is empty")
+                continue
+            if 'minLength' in rule and len(value) < rule['minLength']:
+                problems.append(f"{label} is {len(value)} characters (min {rule['minLength']})")
+            if 'maxLength' in rule and len(value) > rule['maxLength']:
+                problems.append(f"{label} is {len(value)} characters (max {rule['maxLength']})")
+        return problems
+    
+    def strapi_attributes(self, table_data):
+        """Map extracted table data to Strapi attributes, in mapping order"""
+        return {key: table_data.get(label, "") for label, key in self.fields}
+    
+    @classmethod
+    def from_config(cls, config, path=None):
+        """Build a mapping from a parsed config dict"""
+        entries = config.get('fields') if isinstance(config, dict) else None
+        if not entries:
+            raise ValueError("Mapping config must define a non-empty 'fields' list")
+        
+        fields = []
+        aliases = {}
+        rules = {}
+        for entry in entries:
+            if not isinstance(entry, dict) or not entry.get('label') or not entry.get('key'):
+                raise ValueError(f"Mapping entry needs a 'label' and a 'key': {entry!r}")
+            fields.append((entry['label'], entry['key']))
+            aliases[entry['label']] = list(entry.get('aliases', []))
+            rule = {name: entry[name] for name in RULE_KEYS if name in entry}
+            for name in ('minLength', 'maxLength'):
+                if name in rule and (not isinstance(rule[name], int) or rule[name] < 0):
+                    raise ValueError(f"'{name}' of '{entry['label']}' must be a non-negative integer")
+            if rule:
+                rules[entry['label']] = rule
+        
+        keys = [key for _, key in fields]
+        duplicates = sorted({key for key in keys if keys.count(key) > 1})
+        if duplicates:
+            raise ValueError(f"Strapi keys mapped more than once: {', '.join(duplicates)}")
+        reserved = [key for key in keys if key in RESERVED_KEYS]
+        if reserved:
+            raise ValueError(f"Strapi keys reserved by the converter: {', '.join(reserved)}")
+        
+        return cls(fields, aliases, path, rules)
+
+
+@lru_cache(maxsize=None)
+def _load_mapping(path):
+    # json5 is only needed to read the config, so it is not imported until then
+    import json5
+    with open(path, 'r', encoding='utf-8') as f:
+        config = json5.load(f)
+    return FieldMapping.from_config(config, path)
+
+
+def load_mapping(path=None):
+    """Load and compile a mapping file (cached per path for the process)"""
+    return _load_mapping(os.path.abspath(path or DEFAULT_MAPPING_FILE))
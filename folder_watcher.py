@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Watch-Folder Converter
+Keeps a warm converter running and reconverts .docx files as they change
+"""
+
+import os
+import time
+from collections import deque
+
+
+def strapi_output_file(input_file):
+    """Output path next to the document: name_strapi.json"""
+    return f"{os.path.splitext(input_file)[0]}_strapi.json"
+
+
+def scan_documents(directories):
+    """Snapshot {path: (mtime_ns, size)} of the .docx files below `directories`"""
+    snapshot = {}
+    pending = list(directories)
+    while pending:
+        directory = pending.pop()
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif (entry.name.lower().endswith('.docx') and not entry.name.startswith('~$')
+                        and entry.is_file()):
+                    stat = entry.stat()
+                    snapshot[entry.path] = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                # The file vanished between listing and stat
+                continue
+    return snapshot
+
+
+class FolderWatcher:
+    """Polls folders and reconverts new or modified documents
+
+    A document is converted once its (mtime, size) signature has stayed the
+    same for `debounce` seconds, so Word saves that are still being written
+    are left alone; Word's `~$` lock files are never picked up. On start,
+    documents whose `_strapi.json` is missing or older than the document are
+    converted. A failing document is reported and retried only after it
+    changes again.
+    """
+
+    def __init__(self, directories, converter, interval=1.0, debounce=2.0, verbose=False):
+        self.directories = list(directories)
+        self.converter = converter
+        self.interval = interval
+        self.debounce = debounce
+        self.verbose = verbose
+
+        self.converted = {}   # path -> signature last converted (or failed)
+        self.settling = {}    # path -> (signature, first seen at)
+        self.queue = deque()
+
+        self.ok_count = 0
+        self.failed_count = 0
+        self.last_latency = None
+
+    def prime(self):
+        """Mark documents whose output is already up to date as converted"""
+        for path, signature in scan_documents(self.directories).items():
+            try:
+                output_mtime = os.stat(strapi_output_file(path)).st_mtime_ns
+            except OSError:
+                continue
+            if output_mtime >= signature[0]:
+                self.converted[path] = signature
+
+    def poll(self, now=None):
+        """Scan once and queue the documents that have settled since they changed"""
+        now = time.monotonic() if now is None else now
+        snapshot = scan_documents(self.directories)
+
+        for path in list(self.converted):
+            if path not in snapshot:
+                del self.converted[path]
+        for path in list(self.settling):
+            if path not in snapshot:
+                del self.settling[path]
+
+        for path, signature in snapshot.items():
+            if self.converted.get(path) == signature or path in self.queue:
+                continue
+            seen = self.settling.get(path)
+            if seen is None or seen[0] != signature:
+                self.settling[path] = (signature, now)
+            elif now - seen[1] >= self.debounce:
+                del self.settling[path]
+                self.queue.append(path)
+
+    def process_next(self):
+        """Convert the document at the head of the queue"""
+        path = self.queue.popleft()
+        try:
+            signature = os.stat(path)
+            signature = (signature.st_mtime_ns, signature.st_size)
+        except OSError:
+            return
+
+        output_file = strapi_output_file(path)
+        start = time.perf_counter()
+        changes = None
+        try:
+            strapi_data = self.converter.convert_to_strapi(path)
+            _, changes, _ = self.converter.emit_strapi_file(path, strapi_data, output_file)
+            error = None
+            self.ok_count += 1
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            self.failed_count += 1
+        self.last_latency = time.perf_counter() - start
+        self.converted[path] = signature
+
+        if error:
+            print(f"FAILED {path}: {error}")
+        elif self.verbose and changes == []:
+            print(f"same   {path} (unchanged, not written)")
+        elif self.verbose:
+            print(f"ok     {path} -> {output_file}")
+        print(self.stats_line())
+
+    def stats_line(self):
+        """One-line summary: counts, queue depth and last conversion latency"""
+        latency = f"{self.last_latency:.2f}s" if self.last_latency is not None else "-"
+        return (f"[watch] converted={self.ok_count} failed={self.failed_count} "
+                f"queue={len(self.queue)} settling={len(self.settling)} last={latency}")
+
+    def run(self):
+        """Poll until interrupted"""
+        self.prime()
+        print(f"Watching {', '.join(self.directories)} (Ctrl+C to stop)")
+        try:
+            while True:
+                self.poll()
+                while self.queue:
+                    self.process_next()
+                time.sleep(self.interval)
+        except KeyboardInterrupt:
+            print("")
+            print(self.stats_line())
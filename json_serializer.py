@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+JSON Serializer
+Pluggable JSON encoding for Strapi layouts: orjson when installed, stdlib otherwise
+"""
+
+import importlib.util
+import json
+
+
+BACKENDS = ('auto', 'orjson', 'json')
+
+
+def orjson_available():
+    """True if orjson can be imported (checked without importing it)"""
+    return importlib.util.find_spec('orjson') is not None
+
+
+class JSONSerializer:
+    """Encodes Strapi layouts straight to UTF-8 bytes
+
+    `backend` is "orjson", "json" (the standard library) or "auto", which
+    picks orjson when it is installed. Output is indented with two spaces,
+    or has no whitespace at all with `compact`. Both backends produce the
+    same text for Strapi layouts, which hold strings, integers, booleans
+    and None in nested dicts and lists (no floats, whose formatting could
+    differ). The backend module is imported on first use and the
+    serializer itself only holds its settings, so it can be handed to
+    worker processes.
+    """
+
+    def __init__(self, backend='auto', compact=False):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown JSON backend '{backend}' (expected one of: {', '.join(BACKENDS)})")
+        if backend == 'auto':
+            backend = 'orjson' if orjson_available() else 'json'
+        elif backend == 'orjson' and not orjson_available():
+            raise ValueError("JSON backend 'orjson' is not installed (pip install orjson)")
+        self.backend = backend
+        self.compact = compact
+
+    def dumps(self, obj):
+        """Encode `obj` as UTF-8 JSON bytes"""
+        if self.backend == 'orjson':
+            import orjson
+            return orjson.dumps(obj, option=0 if self.compact else orjson.OPT_INDENT_2)
+        if self.compact:
+            text = json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+        else:
+            text = json.dumps(obj, indent=2, ensure_ascii=False)
+        return text.encode('utf-8')
+
+    def __repr__(self):
+        return f"JSONSerializer(backend={self.backend!r}, compact={self.compact!r})"
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Media Extractor
+Streams embedded images out of .docx files into a content-addressed folder
+"""
+
+import hashlib
+import mimetypes
+import os
+import tempfile
+import zipfile
+
+
+MEDIA_PREFIX = 'word/media/'
+
+CHUNK_SIZE = 64 * 1024
+
+
+class MediaStore:
+    """Content-addressed store for the images embedded in Word documents
+
+    Each `word/media/*` entry is copied from the zip to a temporary file in
+    `CHUNK_SIZE` pieces while it is hashed, then renamed to
+    `<sha256><ext>`. An image already in the store (from this document,
+    an earlier one, or another worker process sharing the folder) is not
+    written again, so identical screenshots across a batch are stored once.
+    """
+
+    def __init__(self, media_dir):
+        self.media_dir = media_dir
+        os.makedirs(media_dir, exist_ok=True)
+        self.written = 0
+        self.deduplicated = 0
+
+    def extract(self, input_file):
+        """Store the document's images; returns one reference dict per image"""
+        references = []
+        with zipfile.ZipFile(input_file) as archive:
+            for info in archive.infolist():
+                if not info.filename.startswith(MEDIA_PREFIX) or info.is_dir():
+                    continue
+                references.append(self._store(archive, info))
+        return references
+
+    def _store(self, archive, info):
+        name = os.path.basename(info.filename)
+        ext = os.path.splitext(name)[1].lower()
+        digest = hashlib.sha256()
+
+        fd, temp_path = tempfile.mkstemp(dir=self.media_dir, prefix='.partial-')
+        try:
+            with os.fdopen(fd, 'wb') as out, archive.open(info) as source:
+                while True:
+                    chunk = source.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    out.write(chunk)
+
+            stored_name = digest.hexdigest() + ext
+            stored_path = os.path.join(self.media_dir, stored_name)
+            if os.path.exists(stored_path):
+                os.remove(temp_path)
+                self.deduplicated += 1
+            else:
+                os.replace(temp_path, stored_path)
+                self.written += 1
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        return {
+            "name": name,
+            "file": stored_path,
+            "hash": digest.hexdigest(),
+            "size": info.file_size,
+            "mime": mimetypes.guess_type(name)[0] or 'application/octet-stream',
+        }
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+NDJSON Writer
+Streams Strapi records to one newline-delimited JSON file or stdout
+"""
+
+import gzip
+import sys
+import time
+import zlib
+
+from json_serializer import JSONSerializer
+
+
+class NDJSONWriter:
+    """Appends one compact JSON record per line as records are produced
+
+    `path` may be "-" for stdout. With `compress` the stream is gzipped on
+    the fly. Output is flushed every `flush_every` records or
+    `flush_interval` seconds, whichever comes first (a gzip flush is a sync
+    flush, so a reader downstream of a pipe can decode what it has so far).
+    Nothing is kept once written, so memory does not grow with the batch.
+    Records are encoded compactly with the JSON `backend` ("auto", "orjson"
+    or "json").
+    """
+
+    def __init__(self, path, compress=False, flush_every=100, flush_interval=1.0, backend='auto'):
+        self.path = path
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.count = 0
+        self.bytes_written = 0
+        self.serializer = JSONSerializer(backend, compact=True)
+
+        if path == '-':
+            self._raw = sys.stdout.buffer
+            self._owns_raw = False
+        else:
+            self._raw = open(path, 'wb')
+            self._owns_raw = True
+        self._gzip = gzip.GzipFile(fileobj=self._raw, mode='wb') if compress else None
+        self._stream = self._gzip or self._raw
+
+        self._unflushed = 0
+        self._last_flush = time.monotonic()
+
+    def write(self, record):
+        """Write one record as a single line"""
+        line = self.serializer.dumps(record) + b'\n'
+        self._stream.write(line)
+        self.count += 1
+        self.bytes_written += len(line)
+        self._unflushed += 1
+
+        if (self._unflushed >= self.flush_every
+                or time.monotonic() - self._last_flush >= self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        if self._gzip is not None:
+            self._gzip.flush(zlib.Z_SYNC_FLUSH)
+        self._raw.flush()
+        self._unflushed = 0
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        if self._gzip is not None:
+            self._gzip.close()
+        if self._owns_raw:
+            self._raw.close()
+        else:
+            self._raw.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Near-Duplicate Detection
+MinHash signatures of document content and an LSH index that groups near-identical drafts
+"""
+
+import importlib.util
+import random
+import zlib
+
+
+# Hash values are reduced modulo this prime, so a * x + b fits in 64 bits
+PRIME = (1 << 31) - 1
+
+DEFAULT_NUM_PERM = 128
+DEFAULT_SHINGLE_SIZE = 5
+DEFAULT_THRESHOLD = 0.8
+
+# Shingles hashed per NumPy step, bounding the (num_perm x chunk) temporary
+NUMPY_CHUNK = 4096
+
+
+def numpy_available():
+    """True if NumPy can be imported (checked without importing it)"""
+    return importlib.util.find_spec('numpy') is not None
+
+
+def content_text(content):
+    """Plain text of extracted content: a string, or the text nodes of Strapi blocks"""
+    if isinstance(content, str):
+        return content
+    pieces = []
+    stack = list(reversed(content))
+    while stack:
+        node = stack.pop()
+        if 'text' in node:
+            pieces.append(node['text'])
+        stack.extend(reversed(node.get('children', ())))
+    return ' '.join(pieces)
+
+
+def shingle_hashes(text, size=DEFAULT_SHINGLE_SIZE):
+    """Set of hashes of the text's overlapping `size`-word shingles (case and spacing ignored)"""
+    words = text.lower().split()
+    if len(words) <= size:
+        return {zlib.crc32(' '.join(words).encode('utf-8')) % PRIME} if words else set()
+    return {zlib.crc32(' '.join(words[i:i + size]).encode('utf-8')) % PRIME
+            for i in range(len(words) - size + 1)}
+
+
+class MinHasher:
+    """Computes MinHash signatures of shingle hash sets
+
+    Each of the `num_perm` hash functions is h(x) = (a * x + b) mod PRIME
+    with random a and b drawn from `seed`, and the signature holds each
+    function's minimum over the set. The fraction of positions two
+    signatures agree on estimates the Jaccard similarity of their sets.
+    With NumPy (`backend` "numpy", or "auto" when it is installed) all
+    functions are applied to a block of shingles at once; the pure Python
+    path computes the same signatures.
+    """
+
+    def __init__(self, num_perm=DEFAULT_NUM_PERM, seed=1, backend='auto'):
+        if backend not in ('auto', 'numpy', 'python'):
+            raise ValueError(f"Unknown MinHash backend '{backend}' (expected one of: auto, numpy, python)")
+        if backend == 'auto':
+            backend = 'numpy' if numpy_available() else 'python'
+        elif backend == 'numpy' and not numpy_available():
+            raise ValueError("MinHash backend 'numpy' is not installed (pip install numpy)")
+        self.num_perm = num_perm
+        self.backend = backend
+
+        rng = random.Random(seed)
+        self.a = [rng.randrange(1, PRIME) for _ in range(num_perm)]
+        self.b = [rng.randrange(0, PRIME) for _ in range(num_perm)]
+        self._np = None
+
+    def signature(self, hashes):
+        """MinHash signature (a tuple of num_perm ints) of a set of shingle hashes
+
+        Returns None for an empty set: a document without text has no
+        meaningful similarity to anything, and equal placeholder signatures
+        would group every such document together.
+        """
+        if not hashes:
+            return None
+        if self.backend == 'numpy':
+            return self._numpy_signature(hashes)
+        values = list(hashes)
+        return tuple(min((a * x + b) % PRIME for x in values) for a, b in zip(self.a, self.b))
+
+    def _numpy_signature(self, hashes):
+        import numpy as np
+        if self._np is None:
+            self._np = (np.array(self.a, dtype=np.uint64)[:, None], np.array(self.b, dtype=np.uint64)[:, None])
+        a, b = self._np
+        values = np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+        signature = np.full(self.num_perm, PRIME, dtype=np.uint64)
+        for start in range(0, len(values), NUMPY_CHUNK):
+            block = (a * values[None, start:start + NUMPY_CHUNK] + b) % PRIME
+            np.minimum(signature, block.min(axis=1), out=signature)
+        return tuple(int(value) for value in signature)
+
+
+def similarity(signature, other):
+    """Estimated Jaccard similarity of two MinHash signatures"""
+    return sum(1 for x, y in zip(signature, other) if x == y) / len(signature)
+
+
+def lsh_bands(num_perm, threshold):
+    """(bands, rows) splitting a signature so pairs near `threshold` become candidates
+
+    Two documents share a bucket in some band with probability
+    1 - (1 - s^rows)^bands at similarity s; the split whose turning point
+    (1/bands)^(1/rows) is closest to the threshold, erring low, is used.
+    """
+    best = None
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        turning = (1 / bands) ** (1 / rows)
+        # Prefer missing nothing: a turning point above the threshold drops true pairs
+        score = abs(turning - threshold) + (0.1 if turning > threshold else 0)
+        if best is None or score < best[0]:
+            best = (score, bands, rows)
+    return best[1], best[2]
+
+
+class LSHIndex:
+    """Locality-sensitive hashing index grouping signatures into near-duplicate clusters
+
+    Each signature is cut into bands and every band is hashed into a bucket,
+    so only documents sharing a bucket are compared, and adding n documents
+    takes roughly linear time instead of comparing every pair. Candidates
+    are confirmed by their estimated similarity before being clustered.
+    A document joins every candidate it is similar to, so clusters are the
+    connected groups of similar pairs whatever the insertion order.
+    """
+
+    def __init__(self, num_perm=DEFAULT_NUM_PERM, threshold=DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self.bands, self.rows = lsh_bands(num_perm, threshold)
+        self.signatures = {}
+        self._buckets = [{} for _ in range(self.bands)]
+        self._parent = {}
+
+    def _find(self, key):
+        parent = self._parent
+        while parent[key] != key:
+            parent[key] = parent[parent[key]]
+            key = parent[key]
+        return key
+
+    def add(self, key, signature):
+        """Index one document's signature, joining it to any near-duplicate already indexed"""
+        self.signatures[key] = signature
+        self._parent[key] = key
+        for band, buckets in enumerate(self._buckets):
+            start = band * self.rows
+            members = buckets.setdefault(tuple(signature[start:start + self.rows]), [])
+            for other in members:
+                if self._find(other) == self._find(key):
+                    continue
+                if similarity(signature, self.signatures[other]) >= self.threshold:
+                    self._parent[self._find(key)] = self._find(other)
+            members.append(key)
+
+    def clusters(self):
+        """Lists of keys of near-duplicate documents, for groups of two or more"""
+        groups = {}
+        for key in self.signatures:
+            groups.setdefault(self._find(key), []).append(key)
+        return [members for members in groups.values() if len(members) > 1]
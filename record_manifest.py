@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Record Manifest
+Remembers the last record emitted for each document so reconversions can be diffed
+"""
+
+import json
+import os
+import sqlite3
+import time
+
+from conversion_cache import DEFAULT_CACHE_DIR
+
+
+DEFAULT_MANIFEST_FILE = os.path.join(DEFAULT_CACHE_DIR, 'manifest.sqlite3')
+
+# Set by the converter on every run, so never counted as a change
+TIMESTAMP_KEYS = ('publishedAt', 'createdAt', 'updatedAt')
+
+# Carried over from the previous record when a document is reconverted
+PRESERVED_KEYS = ('createdAt', 'publishedAt')
+
+
+def diff_attributes(previous, current):
+    """Names of the attributes that differ between two records, timestamps aside
+
+    An attribute missing from either side counts as changed.
+    """
+    names = list(current) + [name for name in previous if name not in current]
+    return [name for name in names
+            if name not in TIMESTAMP_KEYS and previous.get(name) != current.get(name)]
+
+
+def merge_record(previous, strapi_data):
+    """Reconcile a fresh layout with the previous record of the same document
+
+    Returns (record, changes). For a new document the record is the layout
+    itself and every attribute is a change. Otherwise `createdAt` and
+    `publishedAt` are kept from the previous record; if nothing else changed
+    the previous record is returned unchanged with an empty change list.
+    """
+    attributes = strapi_data["data"]
+    if previous is None:
+        return strapi_data, [name for name in attributes if name not in TIMESTAMP_KEYS]
+
+    previous_attributes = previous["data"]
+    changes = diff_attributes(previous_attributes, attributes)
+    if not changes:
+        return previous, changes
+
+    merged = dict(attributes)
+    for name in PRESERVED_KEYS:
+        if name in previous_attributes:
+            merged[name] = previous_attributes[name]
+    return {"data": merged}, changes
+
+
+def partial_record(record, changes):
+    """Layout holding only the changed attributes (removed ones as None) and updatedAt"""
+    attributes = record["data"]
+    partial = {name: attributes.get(name) for name in changes}
+    if "updatedAt" in attributes:
+        partial["updatedAt"] = attributes["updatedAt"]
+    return {"data": partial}
+
+
+class RecordManifest:
+    """SQLite table of the last record emitted per document
+
+    Documents are keyed by absolute path. Several processes may share one
+    manifest, like the conversion cache. A record stored as `pending` was
+    written but not yet published; it stays pending until
+    `mark_published`, so a failed publish is retried on the next run.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or DEFAULT_MANIFEST_FILE
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(self.path, timeout=30)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS records ('
+            ' source TEXT PRIMARY KEY,'
+            ' data TEXT NOT NULL,'
+            ' emitted REAL NOT NULL,'
+            ' pending INTEGER NOT NULL DEFAULT 0)'
+        )
+        columns = [row[1] for row in self._db.execute('PRAGMA table_info(records)')]
+        if 'pending' not in columns:
+            # Manifests written before publishing was tracked
+            self._db.execute('ALTER TABLE records ADD COLUMN pending INTEGER NOT NULL DEFAULT 0')
+        self._db.commit()
+
+    def lookup(self, input_file):
+        """(last record emitted for the document or None, whether it still awaits publishing)"""
+        row = self._db.execute('SELECT data, pending FROM records WHERE source = ?',
+                               (os.path.abspath(input_file),)).fetchone()
+        if row is None:
+            return None, False
+        return json.loads(row[0]), bool(row[1])
+
+    def get(self, input_file):
+        """Last record emitted for the document, or None"""
+        return self.lookup(input_file)[0]
+
+    def put(self, input_file, record, pending=False):
+        """Remember `record` as the document's last emitted record"""
+        data = json.dumps(record, ensure_ascii=False, separators=(',', ':'))
+        with self._db:
+            self._db.execute('INSERT OR REPLACE INTO records (source, data, emitted, pending) VALUES (?, ?, ?, ?)',
+                             (os.path.abspath(input_file), data, time.time(), int(pending)))
+
+    def mark_published(self, input_files):
+        """Clear the pending flag of documents whose records were published"""
+        with self._db:
+            self._db.executemany('UPDATE records SET pending = 0 WHERE source = ?',
+                                 [(os.path.abspath(input_file),) for input_file in input_files])
+
+    def close(self):
+        self._db.close()
@@ -4,12 +4,47 @@ Sample Word Document Generator
 Creates a sample Word document following the blog template format
 """
 
+import io
+import struct
+import zlib
+
 from docx import Document
 from docx.shared import Inches
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 
-def create_sample_document():
-    """Create a sample Word document with the blog template"""
+FILLER_SENTENCES = [
+    "Consistent publishing builds trust with readers and search engines alike.",
+    "Every post should answer one clear question for a specific audience.",
+    "Measure what matters: traffic is useful, but engaged readers convert.",
+    "Repurpose your best articles into newsletters, threads and short videos.",
+    "Internal links help readers discover older posts and spread ranking signals.",
+    "A strong headline earns the click; a strong introduction earns the read.",
+]
+
+
+def solid_png(width, height, rgb):
+    """Build a small single-colour PNG in memory"""
+    raw = b''.join(b'\x00' + bytes(rgb) * width for _ in range(height))
+    
+    def chunk(kind, data):
+        return (struct.pack('>I', len(data)) + kind + data
+                + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff))
+    
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(raw))
+            + chunk(b'IEND', b''))
+
+
+def create_sample_document(output_file='sample_blog_template.docx', extra_paragraphs=0,
+                           extra_table_rows=0, merged_cells=0, images=0, quiet=False):
+    """Create a sample Word document with the blog template
+
+    The optional arguments grow the document for benchmarking: filler
+    paragraphs appended to the content draft, extra (non-template) rows in
+    the metadata table, rows whose two cells are merged, and embedded
+    images.
+    """
     doc = Document()
     
     # Add title
@@ -21,7 +56,7 @@ def create_sample_document():
     doc.add_paragraph('')
     
     # Create the metadata table
-    table = doc.add_table(rows=9, cols=2)
+    table = doc.add_table(rows=9 + extra_table_rows + merged_cells, cols=2)
     table.style = 'Table Grid'
     
     # Define the template fields and sample values
@@ -43,6 +78,18 @@ def create_sample_document():
         row.cells[0].text = field
         row.cells[1].text = value
     
+    # Extra rows the converter should ignore
+    for i in range(extra_table_rows):
+        row = table.rows[len(fields) + i]
+        row.cells[0].text = f"Editor Note {i + 1}"
+        row.cells[1].text = FILLER_SENTENCES[i % len(FILLER_SENTENCES)]
+    
+    # Rows spanning both columns
+    for i in range(merged_cells):
+        row = table.rows[len(fields) + extra_table_rows + i]
+        merged = row.cells[0].merge(row.cells[1])
+        merged.text = f"Merged note {i + 1}: {FILLER_SENTENCES[i % len(FILLER_SENTENCES)]}"
+    
     # Add some spacing
     doc.add_paragraph('')
     doc.add_paragraph('')
@@ -102,9 +149,20 @@ def create_sample_document():
     
     doc.add_paragraph('Ready to start your blogging journey? Take the first step today and begin building the blog of your dreams!')
     
+    # Filler content for larger documents
+    for i in range(extra_paragraphs):
+        sentences = [FILLER_SENTENCES[(i + j) % len(FILLER_SENTENCES)] for j in range(4)]
+        doc.add_paragraph(f"{i + 1}. " + ' '.join(sentences))
+    
+    # Embedded images, each a different colour so their contents differ
+    for i in range(images):
+        png = solid_png(32, 32, ((i * 53) % 256, (i * 97) % 256, (i * 151) % 256))
+        doc.add_picture(io.BytesIO(png), width=Inches(1))
+    
     # Save the document
-    doc.save('sample_blog_template.docx')
-    print("Sample Word document created: sample_blog_template.docx")
+    doc.save(output_file)
+    if not quiet:
+        print(f"Sample Word document created: {output_file}")
 
 if __name__ == "__main__":
     create_sample_document() 
\ No newline at end of file
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Strapi Export Writer
+Streams Strapi records into a data-transfer archive that `strapi import` loads in one go
+"""
+
+import hashlib
+import io
+import os
+import re
+import sys
+import tarfile
+import time
+from datetime import datetime, timezone
+
+from json_serializer import JSONSerializer
+
+
+# Entities are written in parts of about this many bytes (before compression)
+DEFAULT_PART_SIZE = 16 * 1024 * 1024
+
+UPLOAD_FILE_TYPE = 'plugin::upload.file'
+
+# Attributes Strapi keeps as datetimes rather than strings
+TIMESTAMP_ATTRIBUTES = ('createdAt', 'updatedAt', 'publishedAt')
+
+STRING_MAX_LENGTH = 255
+
+BASE36 = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+
+def content_type_uid(collection):
+    """Content type UID for a collection API name: "articles" -> "api::article.article" """
+    name = collection.strip('/').lower()
+    if name.endswith('ies'):
+        name = name[:-3] + 'y'
+    elif name.endswith('s') and not name.endswith('ss'):
+        name = name[:-1]
+    return f"api::{name}.{name}"
+
+
+def document_id(source):
+    """Stable 24-character Strapi documentId for a source document"""
+    number = int.from_bytes(hashlib.sha256(str(source).encode('utf-8')).digest(), 'big')
+    digits = []
+    while len(digits) < 24:
+        number, digit = divmod(number, 36)
+        digits.append(BASE36[digit])
+    # Strapi's ids start with a letter
+    digits[0] = BASE36[10 + number % 26]
+    return ''.join(digits)
+
+
+class StrapiExportWriter:
+    """Writes Strapi records into a Strapi data-transfer (.tar.gz) archive
+
+    Has the interface of NDJSONWriter, so convert_batch can stream records
+    into it as they are converted. Each record becomes one line of
+    entities/entities_NNNNN.jsonl. Lines are gathered in memory until the
+    part reaches `part_size` bytes and is then added to the archive, so
+    memory holds at most one part and nothing is staged on disk. Images a
+    record references under "media" (see MediaStore) are streamed from the
+    media store into assets/ once per image hash and listed as upload
+    file entities. The schema, links, configuration and metadata.json
+    members are added on close.
+
+    `path` may be "-" for stdout. Records are imported into the collection
+    with API name `collection`, as content type `content_type` (by default
+    derived from it, see content_type_uid).
+    """
+
+    def __init__(self, path, collection='articles', content_type=None, part_size=DEFAULT_PART_SIZE,
+                 backend='auto'):
+        self.path = path
+        self.collection = collection.strip('/')
+        self.content_type = content_type or content_type_uid(self.collection)
+        self.part_size = part_size
+        self.count = 0
+        self.media_count = 0
+        self.bytes_written = 0
+        self.serializer = JSONSerializer(backend, compact=True)
+
+        if path == '-':
+            self._tar = tarfile.open(fileobj=sys.stdout.buffer, mode='w|gz')
+        else:
+            self._tar = tarfile.open(path, mode='w:gz')
+
+        self._part = []
+        self._part_bytes = 0
+        self._parts = 0
+        self._ids = {}
+        self._media = set()
+        # Attribute name -> longest string value (None for blocks), for the schema
+        self._attributes = {}
+
+    def write(self, record):
+        """Add one record (a layout, optionally with its "source") as an entity"""
+        data = dict(record.get('data', record))
+        media = data.pop('media', None) or []
+        entity_id = self._next_id(self.content_type)
+        source = record.get('source')
+        self._add_entity(self.content_type, entity_id, {
+            "id": entity_id,
+            "documentId": document_id(source if source is not None else entity_id),
+            **data,
+        })
+        for name, value in data.items():
+            if isinstance(value, list):
+                self._attributes[name] = None
+            elif self._attributes.get(name, 0) is not None:
+                length = len(value) if isinstance(value, str) else 0
+                self._attributes[name] = max(self._attributes.get(name, 0), length)
+        for reference in media:
+            self._add_media(reference)
+        self.count += 1
+
+    def _next_id(self, entity_type):
+        self._ids[entity_type] = self._ids.get(entity_type, 0) + 1
+        return self._ids[entity_type]
+
+    def _add_entity(self, entity_type, entity_id, data):
+        line = self.serializer.dumps({"type": entity_type, "id": entity_id, "data": data}) + b'\n'
+        self._part.append(line)
+        self._part_bytes += len(line)
+        self.bytes_written += len(line)
+        if self._part_bytes >= self.part_size:
+            self._flush_part()
+
+    def _flush_part(self):
+        if not self._part:
+            return
+        self._parts += 1
+        self._add_bytes(f"entities/entities_{self._parts:05d}.jsonl", b''.join(self._part))
+        self._part = []
+        self._part_bytes = 0
+
+    def _add_media(self, reference):
+        """Copy one stored image into assets/ and register it as an upload file"""
+        if reference["hash"] in self._media:
+            return
+        self._media.add(reference["hash"])
+        ext = os.path.splitext(reference["file"])[1]
+        file_name = f"{reference['hash']}{ext}"
+        file_id = self._next_id(UPLOAD_FILE_TYPE)
+        data = {
+            "id": file_id,
+            "name": reference["name"],
+            "hash": reference["hash"],
+            "ext": ext,
+            "mime": reference["mime"],
+            "size": round(reference["size"] / 1000, 2),
+            "url": f"/uploads/{file_name}",
+            "provider": "local",
+        }
+
+        info = self._tar.gettarinfo(reference["file"], arcname=f"assets/uploads/{file_name}")
+        info.mode = 0o644
+        info.uid = info.gid = 0
+        info.uname = info.gname = ''
+        with open(reference["file"], 'rb') as f:
+            self._tar.addfile(info, f)
+        self._add_bytes(f"assets/metadata/{file_name}.json", self.serializer.dumps(data))
+        self._add_entity(UPLOAD_FILE_TYPE, file_id, data)
+        self.media_count += 1
+
+    def _add_bytes(self, name, data):
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mtime = int(time.time())
+        info.mode = 0o644
+        self._tar.addfile(info, io.BytesIO(data))
+
+    def schema(self):
+        """Schema of the exported content type, inferred from the records written"""
+        singular = self.content_type.rsplit('.', 1)[-1]
+        display = ' '.join(word.capitalize() for word in re.split(r'[-_]', singular))
+        attributes = {}
+        for name, length in self._attributes.items():
+            if name in TIMESTAMP_ATTRIBUTES:
+                attributes[name] = {"type": "datetime"}
+            elif length is None:
+                attributes[name] = {"type": "blocks"}
+            elif name == 'content':
+                attributes[name] = {"type": "richtext"}
+            else:
+                attributes[name] = {"type": "string" if length <= STRING_MAX_LENGTH else "text"}
+        return {
+            "uid": self.content_type,
+            "modelType": "contentType",
+            "kind": "collectionType",
+            "modelName": singular,
+            "globalId": display.replace(' ', ''),
+            "collectionName": self.collection,
+            "info": {"singularName": singular, "pluralName": self.collection, "displayName": display},
+            "options": {"draftAndPublish": True},
+            "attributes": attributes,
+        }
+
+    def close(self):
+        self._flush_part()
+        self._add_bytes('schemas/schemas_00001.jsonl', self.serializer.dumps(self.schema()) + b'\n')
+        self._add_bytes('links/links_00001.jsonl', b'')
+        self._add_bytes('configuration/configuration_00001.jsonl', b'')
+        metadata = {"createdAt": datetime.now(timezone.utc).isoformat(), "strapi": {"version": ""}}
+        self._add_bytes('metadata.json', self.serializer.dumps(metadata))
+        self._tar.close()
+        if self.path == '-':
+            sys.stdout.buffer.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Strapi Publisher
+Uploads Strapi layouts to a Strapi collection over the REST API
+"""
+
+import http.client
+import json
+import queue
+import random
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import repeat
+from urllib.parse import quote, urlsplit
+
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def slugify(text):
+    """URL slug for a title: lowercase words joined by hyphens"""
+    return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-')
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100.0 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class PublishError(Exception):
+    """A request failed for good (non-retryable status or retries exhausted)"""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class ConnectionPool:
+    """Fixed-size pool of keep-alive HTTP(S) connections to one host"""
+
+    def __init__(self, base_url, size, timeout=30):
+        parts = urlsplit(base_url)
+        if parts.scheme not in ('http', 'https'):
+            raise ValueError(f"Unsupported Strapi URL: {base_url}")
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        self.prefix = parts.path.rstrip('/')
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def _connect(self):
+        cls = http.client.HTTPSConnection if self.scheme == 'https' else http.client.HTTPConnection
+        return cls(self.host, self.port, timeout=self.timeout)
+
+    def request(self, method, path, body=None, headers=None):
+        """Send one request on a pooled connection; returns (status, headers, body bytes)"""
+        with self._slots:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+            try:
+                conn.request(method, self.prefix + path, body=body, headers=headers or {})
+                response = conn.getresponse()
+                data = response.read()
+            except Exception:
+                conn.close()
+                raise
+            if response.will_close:
+                conn.close()
+            else:
+                self._idle.put(conn)
+            return response.status, response.headers, data
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+class RateLimiter:
+    """Spaces request starts at least 1/rate seconds apart across threads"""
+
+    def __init__(self, rate=None):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+class StrapiPublisher:
+    """Upserts Strapi layouts into a collection
+
+    Each record is looked up by `upsert_field` ("title", or "slug" which is
+    derived from the title and added to the payload) and then updated with
+    PUT or created with POST, so publishing the same document twice does not
+    create a duplicate entry. Requests share a keep-alive connection pool,
+    at most `concurrency` are in flight, an optional `rate` caps requests per
+    second, and 429/5xx responses and connection errors are retried with
+    exponential backoff (honouring Retry-After). A failed POST may still have
+    created its entry, so before it is retried the entry is looked up again.
+    """
+
+    def __init__(self, base_url, collection, token=None, concurrency=4, rate=None,
+                 max_retries=5, backoff=0.5, timeout=30, upsert_field='title'):
+        if upsert_field not in ('title', 'slug'):
+            raise ValueError("upsert_field must be 'title' or 'slug'")
+        self.collection = collection.strip('/')
+        self.token = token
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.upsert_field = upsert_field
+        self.pool = ConnectionPool(base_url, concurrency, timeout)
+        self.limiter = RateLimiter(rate)
+
+        self.latencies = []
+        self.retries = 0
+        self._stats_lock = threading.Lock()
+
+        # Records sharing an upsert value are published one at a time, so two
+        # copies in one batch cannot both miss the lookup and both be created.
+        # Maps each value being published to [lock, number of users]
+        self._key_locks = {}
+        self._key_locks_lock = threading.Lock()
+
+    def _headers(self):
+        headers = {'Accept': 'application/json', 'Content-Type': 'application/json'}
+        if self.token:
+            headers['Authorization'] = f"Bearer {self.token}"
+        return headers
+
+    def _request(self, method, path, payload=None, recheck=None):
+        """Send a request with retries; returns the decoded JSON body
+
+        `recheck` guards requests that are not idempotent: after a failure
+        the server may have acted on (anything but 429) it is called before
+        the retry, and a response it returns is used instead of resending.
+        """
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8') if payload is not None else None
+        attempt = 0
+        while True:
+            self.limiter.wait()
+            start = time.perf_counter()
+            try:
+                status, headers, data = self.pool.request(method, path, body, self._headers())
+                error = None
+            except (OSError, http.client.HTTPException) as e:
+                status, headers, data = None, {}, b''
+                error = f"{type(e).__name__}: {e}"
+            with self._stats_lock:
+                self.latencies.append(time.perf_counter() - start)
+
+            if status is not None and status < 300:
+                return json.loads(data) if data else {}
+
+            retryable = status is None or status in RETRY_STATUSES
+            if not retryable or attempt >= self.max_retries:
+                message = error or f"{method} {path} returned HTTP {status}: {data[:200].decode('utf-8', 'replace')}"
+                raise PublishError(message, status)
+
+            attempt += 1
+            with self._stats_lock:
+                self.retries += 1
+            delay = self.backoff * (2 ** (attempt - 1)) * (1 + random.random())
+            retry_after = headers.get('Retry-After') if headers else None
+            if retry_after and retry_after.isdigit():
+                delay = max(delay, float(retry_after))
+            time.sleep(delay)
+            if recheck is not None and status != 429:
+                response = recheck()
+                if response is not None:
+                    return response
+
+    def _find_existing(self, value):
+        """ID of the entry whose upsert field equals `value`, or None"""
+        path = (f"/api/{self.collection}?filters[{self.upsert_field}][$eq]={quote(value)}"
+                f"&pagination[pageSize]=1")
+        found = self._request('GET', path).get('data') or []
+        if not found:
+            return None
+        # Strapi 5 addresses entries by documentId, Strapi 4 by id
+        return found[0].get('documentId') or found[0].get('id')
+
+    def upsert_value(self, attributes):
+        """Value of the upsert field for a record's attributes"""
+        if self.upsert_field == 'slug':
+            return attributes.get('slug') or slugify(attributes.get('title', ''))
+        return attributes.get('title', '')
+
+    def publish(self, strapi_data, changed=None, previous=None):
+        """Create or update one entry; returns a result dict (title, action, id, error)
+
+        With `changed` (attribute names) an existing entry is only sent those
+        attributes, the upsert field and updatedAt; a new entry is always created from the full
+        record. `previous` holds the attributes last emitted for the document
+        and finds its entry even when the upsert field itself has changed.
+        """
+        data = dict(strapi_data.get('data', strapi_data))
+        # Media references point at local files, not Strapi upload IDs
+        data.pop('media', None)
+        if self.upsert_field == 'slug':
+            data.setdefault('slug', slugify(data.get('title', '')))
+        value = self.upsert_value(previous) if previous else data.get(self.upsert_field, '')
+        result = {"title": data.get('title', ''), "action": None, "id": None, "error": None}
+
+        if not value:
+            result["error"] = f"Record has no {self.upsert_field} to upsert by"
+            return result
+
+        with self._key_locks_lock:
+            key_lock = self._key_locks.setdefault(value, [threading.Lock(), 0])
+            key_lock[1] += 1
+
+        try:
+            with key_lock[0]:
+                result["action"], result["id"] = self._upsert(value, data, changed)
+        except (PublishError, ValueError) as e:
+            result["error"] = str(e)
+        finally:
+            with self._key_locks_lock:
+                key_lock[1] -= 1
+                if not key_lock[1]:
+                    del self._key_locks[value]
+        return result
+
+    def _upsert(self, value, data, changed=None):
+        """Update the entry matching `value` or create one; returns (action, id)"""
+        entry_id = self._find_existing(value)
+        if entry_id is None:
+            def recheck():
+                created_id = self._find_existing(data.get(self.upsert_field, ''))
+                return {"data": {"documentId": created_id}} if created_id is not None else None
+
+            response = self._request('POST', f"/api/{self.collection}", {"data": data}, recheck)
+            created = response.get('data') or {}
+            return "created", created.get('documentId') or created.get('id')
+
+        if changed is not None:
+            # Only the changed attributes; removed ones are cleared with None. The
+            # upsert field is always sent, or a renamed title would leave the
+            # entry's slug behind and the next lookup would miss it
+            partial = {name: data.get(name) for name in changed if name != 'media'}
+            partial[self.upsert_field] = data.get(self.upsert_field)
+            if 'updatedAt' in data:
+                partial['updatedAt'] = data['updatedAt']
+            data = partial
+        self._request('PUT', f"/api/{self.collection}/{entry_id}", {"data": data})
+        return "updated", entry_id
+
+    def publish_many(self, records, changed=None, previous=None):
+        """Publish an iterable of Strapi layouts with bounded concurrency
+
+        `changed` and `previous`, if given, are parallel iterables handed to
+        publish with each record. Records are read from `records` only a
+        bounded window ahead of the requests; results come back in order.
+        """
+        jobs = enumerate(zip(records, changed or repeat(None), previous or repeat(None)))
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            window = 2 * self.concurrency
+            pending = {}
+
+            def submit_more():
+                for index, args in jobs:
+                    pending[executor.submit(self.publish, *args)] = index
+                    if len(pending) >= window:
+                        break
+
+            submit_more()
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[pending.pop(future)] = future.result()
+                submit_more()
+        return [results[index] for index in range(len(results))]
+
+    def latency_percentiles(self):
+        """p50/p90/p99/max request latency in seconds"""
+        with self._stats_lock:
+            latencies = list(self.latencies)
+        return {
+            "requests": len(latencies),
+            "p50": percentile(latencies, 50),
+            "p90": percentile(latencies, 90),
+            "p99": percentile(latencies, 99),
+            "max": max(latencies) if latencies else 0.0,
+        }
+
+    def close(self):
+        self.pool.close()
+
+
+def print_publish_summary(results, publisher):
+    """Print created/updated/failed counts, errors and request latency percentiles"""
+    failed = [r for r in results if r["error"]]
+    stats = publisher.latency_percentiles()
+
+    print("")
+    print("PUBLISH SUMMARY:")
+    print("=" * 50)
+    print(f"Created:   {sum(1 for r in results if r['action'] == 'created')}")
+    print(f"Updated:   {sum(1 for r in results if r['action'] == 'updated')}")
+    print(f"Failed:    {len(failed)}")
+    print(f"Requests:  {stats['requests']} ({publisher.retries} retries)")
+    print(f"Latency:   p50 {stats['p50'] * 1000:.0f}ms, p90 {stats['p90'] * 1000:.0f}ms, "
+          f"p99 {stats['p99'] * 1000:.0f}ms, max {stats['max'] * 1000:.0f}ms")
+
+    if failed:
+        print("")
+        print("Errors:")
+        for result in failed:
+            print(f"  {result['title'] or '(untitled)'}: {result['error']}")
@@ -0,0 +1,85 @@
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+# The modules are top-level scripts in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class StubStrapi(BaseHTTPRequestHandler):
+    """Minimal Strapi collection API held in `server.entries`
+
+    `server.faults` maps a method to a list of (status, apply) answers used,
+    in order, before requests are served normally: the request is answered
+    with `status`, after being carried out if `apply` is true.
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def reply(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if status == 429:
+            self.send_header('Retry-After', '0')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def handle_method(self, method, action):
+        server = self.server
+        with server.lock:
+            server.requests.append(method)
+            faults = server.faults.get(method)
+            status, apply = faults.pop(0) if faults else (None, True)
+            body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+            payload = action(json.loads(body)["data"] if body else None) if apply else None
+        if status is not None:
+            return self.reply(status, {"error": {"status": status}})
+        self.reply(200 if method != 'POST' else 201, payload)
+
+    def do_GET(self):
+        def find(_):
+            query = parse_qs(urlsplit(self.path).query)
+            field, value = next((key[len('filters['):-len('][$eq]')], values[0])
+                                for key, values in query.items() if key.startswith('filters['))
+            return {"data": [{"documentId": key} for key, data in self.server.entries.items()
+                             if data.get(field) == value]}
+        self.handle_method('GET', find)
+
+    def do_POST(self):
+        def create(data):
+            key = f"doc{len(self.server.entries) + 1}"
+            self.server.entries[key] = data
+            return {"data": {"documentId": key}}
+        self.handle_method('POST', create)
+
+    def do_PUT(self):
+        def update(data):
+            self.server.entries[self.path.rsplit('/', 1)[1]].update(data)
+            return {"data": {}}
+        self.handle_method('PUT', update)
+
+
+@pytest.fixture
+def strapi():
+    """A running StubStrapi; its URL is `server.url`"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubStrapi)
+    server.entries = {}
+    server.faults = {}
+    server.requests = []
+    server.lock = threading.Lock()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
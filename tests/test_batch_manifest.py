@@ -0,0 +1,47 @@
+"""Checkpointed batches record every document, hashed by the workers"""
+
+import os
+
+from batch_manifest import BatchManifest
+from cli_converter import convert_batch
+from conversion_cache import file_digest
+from sample_template import create_sample_document
+
+
+def rows(manifest):
+    return {os.path.basename(row[0]): row[1:] for row in manifest._db.execute(
+        'SELECT input, status, input_hash, error FROM documents')}
+
+
+def test_missing_input_is_recorded_as_failed(tmp_path):
+    draft = str(tmp_path / "draft.docx")
+    create_sample_document(draft, quiet=True)
+    missing = str(tmp_path / "missing.docx")
+    manifest = BatchManifest(str(tmp_path / "checkpoint.sqlite"))
+
+    to_run = manifest.plan([draft, missing])
+    assert to_run == [draft, missing]
+    planned = rows(manifest)
+    assert planned["draft.docx"] == ('pending', None, None)
+    assert planned["missing.docx"][0] == 'failed'
+    assert planned["missing.docx"][2].startswith('FileNotFoundError')
+    manifest.close()
+
+
+def test_workers_hash_the_documents(tmp_path):
+    draft = str(tmp_path / "draft.docx")
+    create_sample_document(draft, quiet=True)
+    missing = str(tmp_path / "missing.docx")
+    manifest = BatchManifest(str(tmp_path / "checkpoint.sqlite"))
+
+    results = convert_batch([draft, missing], jobs=1, cache_dir=False, checkpoint=manifest)
+    manifest.flush()
+    assert [r["error"] is None for r in results] == [True, False]
+    recorded = rows(manifest)
+    assert recorded["draft.docx"][:2] == ('done', file_digest(draft))
+    assert recorded["missing.docx"][0] == 'failed'
+
+    # Touched but identical: recognised by its hash and not converted again
+    os.utime(draft, ns=(0, 0))
+    assert manifest.plan([draft]) == []
+    manifest.close()
@@ -0,0 +1,11 @@
+"""The headless entry points must stay cheap to import
+
+Only the modules loaded are checked: import times vary too much between
+machines to assert on. `python benchmark.py --check-imports` checks both.
+"""
+
+from benchmark import check_imports
+
+
+def test_heavy_modules_are_deferred():
+    assert check_imports(None)
@@ -0,0 +1,41 @@
+"""A record whose publish failed must be published again by the next incremental run"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+from sample_template import create_sample_document
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.mark.parametrize("mode", [[], ["--jobs", "1"], ["--jobs", "1", "--pipeline"]],
+                         ids=["single", "batch", "pipeline"])
+def test_failed_publish_is_retried(tmp_path, strapi, mode):
+    drafts = tmp_path / "drafts"
+    drafts.mkdir()
+    draft = str(drafts / "draft.docx")
+    create_sample_document(draft, quiet=True)
+    source = draft if not mode else str(drafts)
+    command = [sys.executable, os.path.join(REPO, 'cli_converter.py'), source, *mode, '--incremental',
+               '--manifest', str(tmp_path / 'manifest.sqlite'), '--cache-dir', str(tmp_path / 'cache'),
+               '--publish', strapi.url]
+    strapi.faults['POST'] = [(400, False)]
+
+    def run():
+        return subprocess.run(command, cwd=str(tmp_path), capture_output=True, text=True, timeout=120)
+
+    first = run()
+    assert first.returncode != 0, first.stdout
+    assert strapi.entries == {}
+
+    second = run()
+    assert second.returncode == 0, second.stdout + second.stderr
+    assert strapi.requests.count('POST') == 2
+    assert len(strapi.entries) == 1
+
+    third = run()
+    assert third.returncode == 0, third.stdout + third.stderr
+    assert strapi.requests.count('POST') == 2
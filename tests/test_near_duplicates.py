@@ -0,0 +1,32 @@
+"""Near-duplicate clusters must not depend on the order documents are indexed"""
+
+import itertools
+
+import pytest
+
+from near_duplicates import LSHIndex, MinHasher, shingle_hashes
+
+NUM_PERM = 100
+
+
+def signatures():
+    """K, A and B with A~K = 0.81, B~K = 0.91 and A~B = 0.74"""
+    k = list(range(NUM_PERM))
+    a = k[:81] + [1000 + i for i in range(81, NUM_PERM)]
+    b = k[:74] + [2000 + i for i in range(74, 81)] + k[81:98] + [2000 + i for i in range(98, NUM_PERM)]
+    return {"K": tuple(k), "A": tuple(a), "B": tuple(b)}
+
+
+@pytest.mark.parametrize("order", list(itertools.permutations("KAB")), ids="".join)
+def test_clusters_ignore_insertion_order(order):
+    index = LSHIndex(NUM_PERM, threshold=0.75)
+    for key in order:
+        index.add(key, signatures()[key])
+    assert [sorted(cluster) for cluster in index.clusters()] == [["A", "B", "K"]]
+
+
+def test_numpy_signatures_match_python():
+    pytest.importorskip("numpy")
+    hashes = shingle_hashes(" ".join(f"word{i % 9973}" for i in range(20000)))
+    python = MinHasher(backend='python').signature(hashes)
+    assert MinHasher(backend='numpy').signature(hashes) == python
@@ -0,0 +1,58 @@
+"""Upserts, retries and the failure summary against a stub Strapi"""
+
+from strapi_publisher import StrapiPublisher, print_publish_summary
+
+
+def record(title, body='Body'):
+    return {"data": {"title": title, "content": body}}
+
+
+def publisher_for(strapi, **options):
+    return StrapiPublisher(strapi.url, 'articles', backoff=0, **options)
+
+
+def test_upsert_updates_the_existing_entry(strapi):
+    publisher = publisher_for(strapi)
+    first = publisher.publish(record('Post'))
+    second = publisher.publish(record('Post', 'Edited'))
+    publisher.close()
+
+    assert (first["action"], second["action"]) == ("created", "updated")
+    assert second["id"] == first["id"]
+    assert list(strapi.entries.values()) == [{"title": 'Post', "content": 'Edited'}]
+    assert publisher._key_locks == {}
+
+
+def test_rate_limited_post_is_retried(strapi):
+    strapi.faults['POST'] = [(429, False)]
+    publisher = publisher_for(strapi)
+    result = publisher.publish(record('Post'))
+    publisher.close()
+
+    assert result["error"] is None and result["action"] == "created"
+    assert publisher.retries == 1
+    assert strapi.requests == ['GET', 'POST', 'POST']
+
+
+def test_failed_post_that_created_the_entry_is_not_resent(strapi):
+    strapi.faults['POST'] = [(502, True)]
+    publisher = publisher_for(strapi)
+    result = publisher.publish(record('Post'))
+    publisher.close()
+
+    assert result["error"] is None and result["id"] == 'doc1'
+    assert len(strapi.entries) == 1
+    assert strapi.requests == ['GET', 'POST', 'GET']
+
+
+def test_failures_are_summarized(strapi, capsys):
+    strapi.faults['POST'] = [(400, False)]
+    publisher = publisher_for(strapi, concurrency=1)
+    results = publisher.publish_many([record('Rejected'), record('Accepted'), record('Accepted', 'Again')])
+    publisher.close()
+    print_publish_summary(results, publisher)
+
+    assert [r["action"] for r in results] == [None, "created", "updated"]
+    output = capsys.readouterr().out
+    assert "Created:   1" in output and "Updated:   1" in output and "Failed:    1" in output
+    assert "Rejected: POST /api/articles returned HTTP 400" in output
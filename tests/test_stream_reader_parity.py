@@ -0,0 +1,112 @@
+"""The stream engine must extract exactly what the python-docx engine does"""
+
+import pytest
+from docx import Document
+from docx.enum.text import WD_BREAK
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+
+from converter_core import ConversionCore
+from sample_template import create_sample_document
+
+
+def assert_parity(path):
+    core = ConversionCore()
+    expected = core.extract_document(Document(path))
+    assert core.extract_streaming(path) == expected
+    return expected
+
+
+@pytest.mark.parametrize("options", [
+    {},
+    {"extra_paragraphs": 50},
+    {"extra_table_rows": 20},
+    {"merged_cells": 10},
+    {"images": 3},
+    {"extra_paragraphs": 20, "extra_table_rows": 5, "merged_cells": 5, "images": 2},
+])
+def test_sample_documents(tmp_path, options):
+    path = str(tmp_path / "draft.docx")
+    create_sample_document(path, quiet=True, **options)
+    table_data, content = assert_parity(path)
+    assert table_data["Working Title"]
+    assert content
+
+
+def test_merged_cells_and_extra_tables(tmp_path):
+    doc = Document()
+    legend = doc.add_table(rows=1, cols=2)
+    legend.cell(0, 0).text = 'Legend'
+    legend.cell(0, 1).text = 'n/a'
+    table = doc.add_table(rows=4, cols=3)
+    table.cell(0, 0).text = 'Working Title'
+    table.cell(0, 1).merge(table.cell(0, 2)).text = 'Merged title'
+    table.cell(1, 0).text = 'Author'
+    table.cell(1, 1).text = 'Ann'
+    table.cell(1, 2).merge(table.cell(3, 2)).text = 'spans rows'
+    table.cell(2, 0).text = 'Topic'
+    table.cell(2, 1).text = 'line\tone'
+    table.cell(3, 0).text = 'CTA'
+    table.cell(3, 1).add_paragraph('second paragraph')
+    doc.add_paragraph('Content Draft')
+    doc.add_paragraph('Body text')
+    trailing = doc.add_table(rows=1, cols=2)
+    trailing.cell(0, 0).text = 'Working Title'
+    trailing.cell(0, 1).text = 'Not the title'
+    doc.add_paragraph('After the table')
+    path = str(tmp_path / "tables.docx")
+    doc.save(path)
+
+    table_data, content = assert_parity(path)
+    assert table_data["Working Title"] == 'Merged title'
+    assert table_data["CTA"] == 'second paragraph'
+    assert content == 'Body text\n\nAfter the table'
+
+
+def add_hyperlink(paragraph, text, url):
+    rel_id = paragraph.part.relate_to(url, RT.HYPERLINK, is_external=True)
+    hyperlink = OxmlElement('w:hyperlink')
+    hyperlink.set(qn('r:id'), rel_id)
+    run = OxmlElement('w:r')
+    text_elem = OxmlElement('w:t')
+    text_elem.text = text
+    run.append(text_elem)
+    hyperlink.append(run)
+    paragraph._p.append(hyperlink)
+
+
+def test_hyperlinks_and_breaks(tmp_path):
+    doc = Document()
+    table = doc.add_table(rows=2, cols=2)
+    table.cell(0, 0).text = 'Working Title'
+    title = table.cell(0, 1).paragraphs[0]
+    title.add_run('Read ')
+    add_hyperlink(title, 'the guide', 'https://example.com/guide')
+    table.cell(1, 0).text = 'Author'
+    author = table.cell(1, 1).paragraphs[0].add_run('Ann')
+    author.add_break(WD_BREAK.LINE)
+    author.add_text('Editor')
+    doc.add_paragraph('Content Draft')
+    body = doc.add_paragraph('Before the break')
+    body.runs[0].add_break(WD_BREAK.PAGE)
+    body.add_run('after the break ')
+    add_hyperlink(body, 'with a link', 'https://example.com/')
+    doc.add_paragraph('Next column').runs[0].add_break(WD_BREAK.COLUMN)
+    path = str(tmp_path / "links.docx")
+    doc.save(path)
+
+    table_data, content = assert_parity(path)
+    assert table_data["Working Title"] == 'Read the guide'
+    assert table_data["Author"] == 'Ann\nEditor'
+    assert content == 'Before the breakafter the break with a link\n\nNext column'
+
+
+def test_document_without_table(tmp_path):
+    doc = Document()
+    doc.add_paragraph('Content Draft')
+    doc.add_paragraph('Orphan text')
+    path = str(tmp_path / "plain.docx")
+    doc.save(path)
+
+    assert assert_parity(path) == ({}, '')
@@ -4,17 +4,47 @@ Word to Strapi Converter
 Converts Word documents following a blog template to Strapi layouts
 """
 
+import argparse
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 import json
-from docx import Document
 import re
 import os
-from datetime import datetime
+import queue
+import threading
+
+from conversion_metrics import MetricsAggregator, PhaseProfiler, profile_phase
+from converter_core import ConversionCore
 
 
 class WordToStrapiConverter:
-    def __init__(self):
+    # Conversion phases reported to the progress bar, in order
+    PHASES = [
+        ("load", "Loading document"),
+        ("table", "Extracting table data"),
+        ("content", "Extracting content"),
+        ("layout", "Generating Strapi layout"),
+        ("save", "Saving JSON"),
+    ]
+    
+    # Profiler phase names; "save" records serialization and write itself
+    PROFILE_PHASES = {
+        "load": "load",
+        "table": "table_extraction",
+        "content": "content_extraction",
+        "layout": "layout_generation",
+    }
+    
+    # How often the UI checks the worker's event queue
+    POLL_INTERVAL_MS = 100
+    
+    # The results pane is filled in chunks from `after` callbacks so the Text
+    # widget never lays out a whole long document in one go, and stops at
+    # RESULTS_CAP_CHARS until "Show full" is pressed
+    RENDER_CHUNK_CHARS = 8 * 1024
+    RESULTS_CAP_CHARS = 100 * 1024
+    
+    def __init__(self, profile=False):
         self.root = tk.Tk()
         self.root.title("Word to Strapi Converter")
         self.root.geometry("900x700")
@@ -37,21 +67,33 @@ class WordToStrapiConverter:
         
         self.root.configure(bg=self.colors['bg_primary'])
         
-        # Template fields
-        self.template_fields = [
-            "Working Title",
-            "Author", 
-            "Topic",
-            "Blog Category",
-            "Target Keywords",
-            "Target Audience",
-            "Funnel Stage",
-            "CTA",
-            "Working Meta Description"
-        ]
+        # Headless converter shared with the CLI; it also holds the profiler
+        # of the conversion in progress
+        self.core = ConversionCore()
+        self.mapping = self.core.mapping
+        self.template_fields = self.core.template_fields
+        
+        # Conversion runs on a background worker thread. The UI hands it file
+        # paths through `jobs` and polls `events` for progress and results, so
+        # no Tk call is ever made off the main thread.
+        self.jobs = queue.Queue()
+        self.events = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.current_file = None
+        self.selected_files = []
+        
+        # Opt-in profiling: each conversion's phases are printed to the console
+        self.metrics = MetricsAggregator() if profile else None
+        
+        self.render_pieces = None
+        self.render_job = None
+        self.rendered_chars = 0
+        self.worker = threading.Thread(target=self.conversion_worker, daemon=True)
+        self.worker.start()
         
         self.setup_ui()
         self.setup_hover_effects()
+        self.root.after(self.POLL_INTERVAL_MS, self.poll_events)
     
     def setup_hover_effects(self):
         """Setup hover effects for buttons"""
@@ -63,12 +105,16 @@ class WordToStrapiConverter:
                 event.widget.configure(bg=self.colors['button_primary'])
             elif event.widget == self.convert_btn:
                 event.widget.configure(bg=self.colors['button_secondary'])
+            elif event.widget == self.cancel_btn:
+                event.widget.configure(bg=self.colors['bg_accent'])
         
         # Bind hover effects
         self.browse_btn.bind("<Enter>", on_enter)
         self.browse_btn.bind("<Leave>", on_leave)
         self.convert_btn.bind("<Enter>", on_enter)
         self.convert_btn.bind("<Leave>", on_leave)
+        self.cancel_btn.bind("<Enter>", on_enter)
+        self.cancel_btn.bind("<Leave>", on_leave)
     
     def setup_ui(self):
         """Setup the user interface"""
@@ -116,14 +162,46 @@ class WordToStrapiConverter:
                                    relief=tk.FLAT, padx=20, cursor="hand2")
         self.browse_btn.pack(side=tk.RIGHT, padx=(0, 10), pady=10)
         
-        # Convert button
-        self.convert_btn = tk.Button(main_frame, text="Convert to Strapi Layout", 
+        # Convert and cancel buttons
+        button_frame = tk.Frame(main_frame, bg=self.colors['bg_primary'])
+        button_frame.pack(pady=(20, 10))
+        
+        self.convert_btn = tk.Button(button_frame, text="Convert to Strapi Layout", 
                                     command=self.convert_document,
                                     bg=self.colors['button_secondary'], 
                                     fg=self.colors['text_primary'], 
                                     font=("Helvetica", 14, "bold"),
                                     relief=tk.FLAT, padx=30, pady=10, cursor="hand2")
-        self.convert_btn.pack(pady=20)
+        self.convert_btn.pack(side=tk.LEFT, padx=(0, 10))
+        
+        self.cancel_btn = tk.Button(button_frame, text="Cancel", 
+                                   command=self.cancel_conversion,
+                                   bg=self.colors['bg_accent'], 
+                                   fg=self.colors['text_primary'], 
+                                   font=("Helvetica", 14, "bold"),
+                                   relief=tk.FLAT, padx=20, pady=10, cursor="hand2",
+                                   state=tk.DISABLED)
+        self.cancel_btn.pack(side=tk.LEFT)
+        
+        # Progress of the current conversion, one step per phase
+        progress_frame = tk.Frame(main_frame, bg=self.colors['bg_primary'])
+        progress_frame.pack(fill=tk.X, pady=(0, 20))
+        
+        style = ttk.Style(self.root)
+        style.configure("Strapi.Horizontal.TProgressbar",
+                        troughcolor=self.colors['bg_secondary'],
+                        background=self.colors['accent_primary'])
+        self.progress = ttk.Progressbar(progress_frame, style="Strapi.Horizontal.TProgressbar",
+                                        mode='determinate', maximum=len(self.PHASES))
+        self.progress.pack(fill=tk.X)
+        
+        self.progress_var = tk.StringVar()
+        self.progress_label = tk.Label(progress_frame, textvariable=self.progress_var, 
+                                     anchor=tk.W, 
+                                     bg=self.colors['bg_primary'], 
+                                     fg=self.colors['text_secondary'],
+                                     font=("Helvetica", 10))
+        self.progress_label.pack(fill=tk.X, pady=(5, 0))
         
         # Results frame
         results_frame = tk.LabelFrame(main_frame, text="Extracted Data", 
@@ -148,6 +226,27 @@ class WordToStrapiConverter:
         self.results_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         
+        # Shown when the rendered results were cut off at the cap
+        truncated_frame = tk.Frame(results_frame, bg=self.colors['bg_secondary'])
+        truncated_frame.pack(fill=tk.X, padx=10, pady=(0, 10))
+        
+        self.truncated_var = tk.StringVar()
+        self.truncated_label = tk.Label(truncated_frame, textvariable=self.truncated_var, 
+                                      anchor=tk.W, 
+                                      bg=self.colors['bg_secondary'], 
+                                      fg=self.colors['text_secondary'],
+                                      font=("Helvetica", 10))
+        self.truncated_label.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        
+        self.show_full_btn = tk.Button(truncated_frame, text="Show full", 
+                                      command=self.show_full_results,
+                                      bg=self.colors['bg_accent'], 
+                                      fg=self.colors['text_primary'], 
+                                      font=("Helvetica", 10, "bold"),
+                                      relief=tk.FLAT, padx=10, cursor="hand2",
+                                      state=tk.DISABLED)
+        self.show_full_btn.pack(side=tk.RIGHT)
+        
         # Status bar
         self.status_var = tk.StringVar()
         self.status_var.set("Ready to convert Word documents")
@@ -159,169 +258,299 @@ class WordToStrapiConverter:
         self.status_bar.pack(fill=tk.X, pady=(10, 0))
     
     def browse_file(self):
-        """Open file dialog to select Word document"""
-        file_path = filedialog.askopenfilename(
+        """Open file dialog to select one or more Word documents"""
+        file_paths = filedialog.askopenfilenames(
             title="Select Word Document",
             filetypes=[("Word documents", "*.docx"), ("All files", "*.*")]
         )
-        if file_path:
-            self.file_path_var.set(file_path)
-            self.status_var.set(f"Selected file: {os.path.basename(file_path)}")
+        if file_paths:
+            self.selected_files = list(file_paths)
+            self.file_path_var.set(self.selection_label())
+            if len(file_paths) == 1:
+                self.status_var.set(f"Selected file: {os.path.basename(file_paths[0])}")
+            else:
+                self.status_var.set(f"Selected {len(file_paths)} files")
             self.status_bar.configure(fg=self.colors['success'])
     
-    def extract_table_data(self, doc):
-        """Extract data from the table at the beginning of the document"""
-        table_data = {}
-        
-        for table in doc.tables:
-            for row in table.rows:
-                cells = [cell.text.strip() for cell in row.cells]
-                if len(cells) >= 2:
-                    field_name = cells[0].strip()
-                    field_value = cells[1].strip()
-                    
-                    # Check if this field is in our template
-                    for template_field in self.template_fields:
-                        if template_field.lower() in field_name.lower():
-                            table_data[template_field] = field_value
-                            break
-        
-        return table_data
-    
-    def extract_content(self, doc):
-        """Extract the content draft that follows the table"""
-        content = []
-        table_found = len(doc.tables) > 0  # If there are tables, we assume the template table is present
-        content_section_found = False
-        
-        for paragraph in doc.paragraphs:
-            text = paragraph.text.strip()
-            
-            # Skip empty paragraphs
-            if not text:
-                continue
-            
-            # If we have tables, we can start looking for content
-            if table_found:
-                # Look for the "Content Draft" section
-                if text.lower() == 'content draft':
-                    content_section_found = True
-                    continue
-                
-                # Skip other headers and titles
-                if text.lower() in ['blog template document', 'this document follows the blog template format with a table containing metadata fields followed by the content draft.']:
-                    continue
-                
-                # If we've found the content section, start collecting content
-                if content_section_found:
-                    content.append(text)
-        
-        return '\n\n'.join(content)
-    
-    def generate_strapi_layout(self, table_data, content):
-        """Generate Strapi layout JSON"""
-        strapi_data = {
-            "data": {
-                "title": table_data.get("Working Title", ""),
-                "author": table_data.get("Author", ""),
-                "topic": table_data.get("Topic", ""),
-                "blogCategory": table_data.get("Blog Category", ""),
-                "targetKeywords": table_data.get("Target Keywords", ""),
-                "targetAudience": table_data.get("Target Audience", ""),
-                "funnelStage": table_data.get("Funnel Stage", ""),
-                "cta": table_data.get("CTA", ""),
-                "metaDescription": table_data.get("Working Meta Description", ""),
-                "content": content,
-                "publishedAt": datetime.now().isoformat(),
-                "createdAt": datetime.now().isoformat(),
-                "updatedAt": datetime.now().isoformat()
-            }
-        }
-        
-        return strapi_data
+    def selection_label(self):
+        """Text shown in the path entry for the files picked in the browse dialog"""
+        if len(self.selected_files) == 1:
+            return self.selected_files[0]
+        return f"{self.selected_files[0]} (+{len(self.selected_files) - 1} more)"
     
     def convert_document(self):
-        """Convert the selected Word document to Strapi layout"""
-        file_path = self.file_path_var.get()
+        """Queue the selected Word documents for conversion"""
+        entry_text = self.file_path_var.get()
         
-        if not file_path:
+        if self.selected_files and entry_text == self.selection_label():
+            file_paths = list(self.selected_files)
+        else:
+            file_paths = [entry_text] if entry_text else []
+        
+        if not file_paths:
             messagebox.showerror("Error", "Please select a Word document first.")
             return
         
-        if not os.path.exists(file_path):
+        missing = [path for path in file_paths if not os.path.exists(path)]
+        if missing:
             messagebox.showerror("Error", "Selected file does not exist.")
             return
         
-        try:
+        # Cleared here rather than by the worker, so a Cancel pressed after
+        # these files are queued is never lost
+        self.cancel_event.clear()
+        for file_path in file_paths:
+            self.jobs.put(file_path)
+        
+        self.cancel_btn.configure(state=tk.NORMAL)
+        if self.current_file is None:
             self.status_var.set("Processing document...")
+        else:
+            self.status_var.set(f"Queued {len(file_paths)} file(s), {self.jobs.qsize()} waiting")
+        self.status_bar.configure(fg=self.colors['warning'])
+    
+    def cancel_conversion(self):
+        """Stop the running conversion and drop any queued files"""
+        while True:
+            try:
+                self.jobs.get_nowait()
+            except queue.Empty:
+                break
+        # Set even if no file has started yet: the worker may already have
+        # taken one whose "start" event has not been handled
+        self.cancel_event.set()
+        if self.current_file is not None:
+            self.status_var.set("Cancelling...")
             self.status_bar.configure(fg=self.colors['warning'])
-            self.root.update()
-            
-            # Load the Word document
-            doc = Document(file_path)
-            
-            # Extract table data
-            table_data = self.extract_table_data(doc)
-            
-            # Extract content
-            content = self.extract_content(doc)
-            
-            # Generate Strapi layout
-            strapi_data = self.generate_strapi_layout(table_data, content)
-            
-            # Display results
-            self.display_results(table_data, content, strapi_data)
-            
-            # Save to file
-            self.save_strapi_file(strapi_data, file_path)
+    
+    def conversion_worker(self):
+        """Background thread: convert queued files, reporting through `events`
+
+        Cancellation is checked between phases; a phase that has started runs
+        to completion.
+        """
+        while True:
+            file_path = self.jobs.get()
+            self.events.put(("start", file_path))
             
+            self.core.profiler = PhaseProfiler() if self.metrics is not None else None
+            try:
+                results = {}
+                for index, (phase, _) in enumerate(self.PHASES):
+                    if self.cancel_event.is_set():
+                        self.events.put(("cancelled", file_path))
+                        break
+                    self.events.put(("phase", file_path, index))
+                    self.run_phase(phase, file_path, results)
+                else:
+                    self.events.put(("done", file_path, results))
+                    self.report_profile(file_path, ok=True)
+            except Exception as e:
+                self.events.put(("error", file_path, str(e)))
+                self.report_profile(file_path, ok=False)
+    
+    def run_phase(self, phase, file_path, results):
+        """Run one conversion phase, storing its output in `results`"""
+        if phase == "save":
+            # Records its own serialization and write phases
+            results["output_file"] = self.write_strapi_file(results["strapi_data"], file_path)
+            return
+        
+        core = self.core
+        with profile_phase(core.profiler, self.PROFILE_PHASES[phase]):
+            if phase == "load":
+                results["doc"] = core.load_document(file_path)
+            elif phase == "table":
+                results["table_data"] = core.extract_table_data(results["doc"])
+            elif phase == "content":
+                results["content"] = core.extract_content(results["doc"])
+            elif phase == "layout":
+                results["strapi_data"] = core.generate_strapi_layout(results["table_data"], results["content"])
+        
+        if phase == "content":
+            doc = results.pop("doc")
+            if core.profiler is not None:
+                core.profiler.add_stat("paragraphs", len(doc.paragraphs))
+                core.profiler.add_stat("table_rows", sum(len(table.rows) for table in doc.tables))
+    
+    def report_profile(self, file_path, ok):
+        """Print the profile of the conversion that just ended (profiling only)"""
+        if self.core.profiler is None:
+            return
+        self.metrics.add(self.core.profiler.summary(), ok=ok)
+        self.core.profiler = None
+        print(f"Profiled {file_path}")
+        self.metrics.print_table()
+    
+    def poll_events(self):
+        """Apply worker events to the UI (runs on the Tk main thread)"""
+        try:
+            while True:
+                self.handle_event(self.events.get_nowait())
+        except queue.Empty:
+            pass
+        self.root.after(self.POLL_INTERVAL_MS, self.poll_events)
+    
+    def handle_event(self, event):
+        kind, file_path = event[0], event[1]
+        name = os.path.basename(file_path)
+        
+        if kind == "start":
+            self.current_file = file_path
+            self.progress.configure(value=0)
+            self.status_var.set(f"Processing {name}...")
+            self.status_bar.configure(fg=self.colors['warning'])
+        
+        elif kind == "phase":
+            index = event[2]
+            self.progress.configure(value=index)
+            self.progress_var.set(f"{name}: {self.PHASES[index][1]} ({index + 1}/{len(self.PHASES)})"
+                                  + self.queue_suffix())
+        
+        elif kind == "done":
+            results = event[2]
+            self.progress.configure(value=len(self.PHASES))
+            self.progress_var.set(f"{name}: done" + self.queue_suffix())
+            self.display_results(results["table_data"], results["content"], results["strapi_data"])
             self.status_var.set("Conversion completed successfully!")
             self.status_bar.configure(fg=self.colors['success'])
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"An error occurred: {str(e)}")
+            self.finish_job()
+            if self.jobs.empty():
+                messagebox.showinfo("Success", f"Strapi layout saved to:\n{results['output_file']}")
+        
+        elif kind == "cancelled":
+            self.progress.configure(value=0)
+            self.progress_var.set(f"{name}: cancelled")
+            self.status_var.set("Conversion cancelled")
+            self.status_bar.configure(fg=self.colors['warning'])
+            self.finish_job()
+        
+        elif kind == "error":
+            self.progress_var.set(f"{name}: failed" + self.queue_suffix())
             self.status_var.set("Error during conversion")
             self.status_bar.configure(fg=self.colors['error'])
+            self.finish_job()
+            messagebox.showerror("Error", f"An error occurred: {event[2]}")
+    
+    def queue_suffix(self):
+        waiting = self.jobs.qsize()
+        return f" - {waiting} more queued" if waiting else ""
+    
+    def finish_job(self):
+        self.current_file = None
+        if self.jobs.empty():
+            self.cancel_btn.configure(state=tk.DISABLED)
     
     def display_results(self, table_data, content, strapi_data):
         """Display the extracted data in the results area"""
+        self.cancel_render()
         self.results_text.delete(1.0, tk.END)
-        
+        self.rendered_chars = 0
+        self.render_pieces = self.iter_result_pieces(table_data, content, strapi_data)
+        self.render_next_chunk()
+    
+    def iter_result_pieces(self, table_data, content, strapi_data):
+        """Generate the results text lazily, JSON included"""
         # Display extracted table data
-        self.results_text.insert(tk.END, "EXTRACTED TABLE DATA:\n")
-        self.results_text.insert(tk.END, "=" * 50 + "\n\n")
+        yield "EXTRACTED TABLE DATA:\n"
+        yield "=" * 50 + "\n\n"
         
         for field, value in table_data.items():
-            self.results_text.insert(tk.END, f"{field}: {value}\n")
+            yield f"{field}: {value}\n"
         
-        self.results_text.insert(tk.END, "\n" + "=" * 50 + "\n\n")
+        yield "\n" + "=" * 50 + "\n\n"
         
         # Display content preview
-        self.results_text.insert(tk.END, "CONTENT PREVIEW:\n")
-        self.results_text.insert(tk.END, "=" * 50 + "\n\n")
+        yield "CONTENT PREVIEW:\n"
+        yield "=" * 50 + "\n\n"
         
         content_preview = content[:500] + "..." if len(content) > 500 else content
-        self.results_text.insert(tk.END, content_preview)
+        yield content_preview
         
-        self.results_text.insert(tk.END, "\n\n" + "=" * 50 + "\n\n")
+        yield "\n\n" + "=" * 50 + "\n\n"
+        
+        # Display Strapi JSON, encoded incrementally
+        yield "STRAPI LAYOUT JSON:\n"
+        yield "=" * 50 + "\n\n"
+        yield from json.JSONEncoder(indent=2).iterencode(strapi_data)
+    
+    def render_next_chunk(self, cap=True):
+        """Insert the next chunk of results and schedule the one after it"""
+        self.render_job = None
+        if self.render_pieces is None:
+            return
         
-        # Display Strapi JSON
-        self.results_text.insert(tk.END, "STRAPI LAYOUT JSON:\n")
-        self.results_text.insert(tk.END, "=" * 50 + "\n\n")
-        self.results_text.insert(tk.END, json.dumps(strapi_data, indent=2))
+        limit = self.RENDER_CHUNK_CHARS
+        if cap:
+            limit = min(limit, self.RESULTS_CAP_CHARS - self.rendered_chars)
+        
+        chunk = []
+        size = 0
+        for piece in self.render_pieces:
+            chunk.append(piece)
+            size += len(piece)
+            if size >= limit:
+                break
+        else:
+            self.render_pieces = None
+        
+        text = ''.join(chunk)
+        if size > limit:
+            # Split oversized pieces (e.g. the content string) and keep the rest
+            overflow = text[limit:]
+            text = text[:limit]
+            pieces = self.render_pieces or iter(())
+            self.render_pieces = self.chain_pieces(overflow, pieces)
+        
+        self.results_text.insert(tk.END, text)
+        self.rendered_chars += len(text)
+        
+        if self.render_pieces is None:
+            self.set_truncated(False)
+        elif cap and self.rendered_chars >= self.RESULTS_CAP_CHARS:
+            self.set_truncated(True)
+        else:
+            self.render_job = self.root.after(1, self.render_next_chunk, cap)
     
-    def save_strapi_file(self, strapi_data, original_file_path):
-        """Save the Strapi layout to a JSON file"""
+    @staticmethod
+    def chain_pieces(first, rest):
+        yield first
+        yield from rest
+    
+    def set_truncated(self, truncated):
+        if truncated:
+            self.truncated_var.set(f"Showing the first {self.rendered_chars:,} characters")
+            self.show_full_btn.configure(state=tk.NORMAL)
+        else:
+            self.truncated_var.set("")
+            self.show_full_btn.configure(state=tk.DISABLED)
+    
+    def show_full_results(self):
+        """Render the rest of the results past the cap, still in chunks"""
+        if self.render_pieces is None or self.render_job is not None:
+            return
+        self.truncated_var.set("Rendering full results...")
+        self.show_full_btn.configure(state=tk.DISABLED)
+        self.render_next_chunk(cap=False)
+    
+    def cancel_render(self):
+        """Stop an in-progress render"""
+        if self.render_job is not None:
+            self.root.after_cancel(self.render_job)
+            self.render_job = None
+        self.render_pieces = None
+        self.set_truncated(False)
+    
+    def write_strapi_file(self, strapi_data, original_file_path):
+        """Save the Strapi layout to a JSON file next to the document; returns its path"""
         # Generate output filename
         base_name = os.path.splitext(os.path.basename(original_file_path))[0]
         output_dir = os.path.dirname(original_file_path)
         output_file = os.path.join(output_dir, f"{base_name}_strapi.json")
         
         # Save the file
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(strapi_data, f, indent=2, ensure_ascii=False)
-        
-        messagebox.showinfo("Success", f"Strapi layout saved to:\n{output_file}")
+        self.core.save_strapi_file(strapi_data, output_file)
+        return output_file
     
     def run(self):
         """Run the application"""
@@ -330,7 +559,12 @@ class WordToStrapiConverter:
 
 def main():
     """Main function"""
-    app = WordToStrapiConverter()
+    parser = argparse.ArgumentParser(description='Word to Strapi Converter (GUI)')
+    parser.add_argument('--profile', action='store_true',
+                        help='Print per-phase time and allocation of each conversion to the console')
+    args = parser.parse_args()
+    
+    app = WordToStrapiConverter(profile=args.profile)
     app.run()
 
 